@@ -2,19 +2,41 @@
 
 from dotenv import load_dotenv; load_dotenv()
 import utils.__applist__ as __applist__
-import utils.executor as executor
+import utils.executor as executors
 import utils.narrator as narrator
 import utils.planner as planner
+import utils.trajectory as trajectory
+import utils.llm as llm
+import utils.tracing as tracing
+import utils.router as router
+import utils.compound as compound
+from utils.json_stream import ActionStreamParser
+from utils.dom_diff import DomDiffer
+from utils.ranker import ElementRanker
+from utils.element_index import ElementIndex, ScreenIds
+from utils.dom import DOMSnapshot
+from utils.prompt_budget import ActionLog, estimate_tokens
 import subprocess
-import requests
 import json
 import os
 import time
 import re
 import claude_code  # Import the Claude Code module
 import threading
+from concurrent.futures import ThreadPoolExecutor
 
-executor = executor.Executor()
+executor = None # built on first use by get_executor(); callers may also assign their own
+executor_lock = threading.Lock()
+
+def get_executor():
+    """The UI executor. Building it loads the Swift library, so it waits until a task runs."""
+    global executor
+    with executor_lock:
+        if executor is None:
+            executor = executors.load_executor()
+    return executor
+
+startup_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="zeus-startup")
 print("\033[92mZeus - superagent running...\033[0m\n")
 system_prompt = """You are Zeus, a macOS automation assistant designed to complete user tasks through precise UI interactions.
 
@@ -104,6 +126,14 @@ def format_prompt(dom_string, past_actions, plan_steps, task):
 4. hotkey(keys) - Execute keyboard shortcuts as a list of keys, e.g. ["cmd", "s"] or ["enter"]
 5. wait(seconds) - Wait for a number of seconds (less is better)
 6. finish() - Only call in final block after executing all actions, when the entire task has been successfully completed
+7. click_text(text, role?) - Click the element whose label matches text, e.g. "Send"; role narrows it down ("button", "row", "link")
+8. type_into_labeled(label, text) - Type text into the text field with that label or placeholder, e.g. "To" or "Search"
+9. focus_role(role, text?, index?) - Click an element by role: the one matching text, or the index-th (0-based) of that role
+10. fill_and_submit(fields, submit?, expect?) - Type into several fields ({"label" or "id", "text"}), then submit: "enter" (default), {"text": "Send"}, {"id": 9}, {"keys": [...]} or null. expect is text that should appear afterwards
+11. select_menu_path(path) - Choose a menu item by its titles from the menu bar down, e.g. ["File", "New Folder"]
+12. repeat(action, ids, text?) - Run click_element (or type_in_element with text) on each id in order
+Actions 10-12 check the screen after every step and stop at the first one that fails; the result reports each step. Use them to do a whole form or sequence in one response.
+Actions 7-9 find their target by label among all elements on screen, including ones left out of the list above. Prefer them when the label is clear; if a label matches several elements, the result lists their ids.
 
 ### INPUT FORMAT: MacOS app elements
 [ID_NUMBER]<ELEM_TYPE>content inside</ELEM_TYPE> eg. [14]<AXButton>Click me</AXButton> -> reference using only the ID, 14
@@ -121,7 +151,10 @@ example:
         {"click_element": {"id": 1}},
         {"wait": {"seconds": 1}},
         {"type_in_element": {"id": 7, "text": "new text"}},
-        {"hotkey": {"keys": ["cmd", "t"]}}
+        {"hotkey": {"keys": ["cmd", "t"]}},
+        {"type_into_labeled": {"label": "To", "text": "Alex"}},
+        {"click_text": {"text": "Send", "role": "button"}},
+        {"fill_and_submit": {"fields": [{"label": "Search", "text": "weather"}], "submit": "enter"}}
     ]
 }
 if the goal is already completed, then based on the page respond only with:
@@ -139,151 +172,347 @@ if the goal is already completed, then based on the page respond only with:
 ### GOAL: """ + task + """
 ### GENERAL STEPS: """ + "\n".join([f"{i+1}. {step}" for i, step in enumerate(plan_steps)]) + """
 ### ACTIONS TAKEN SO FAR:\n"""
-    
-    if not past_actions:
-        prompt += "none\n\n"
-    else:
-        for i, action in enumerate(past_actions):
-            prompt += f"{i + 1}. {action}\n\n"
+    # Latest steps in full, older ones folded into a summary line (see utils/prompt_budget.py)
+    prompt += past_actions.render()
+
+    prompt += """Respond with the next actions to take, including your current state analysis. Only call finish() if the task was already completed, based on the page."""
+    return prompt
+
+def format_followup_prompt(screen, past_actions, plan_steps, task):
+    """
+    Prompt for a later turn on the same app. Each request stands alone, so it
+    repeats the goal, plan and action log, but lists the actions in one line each
+    instead of format_prompt's full instructions; screen is the current screen plus
+    what changed since the last turn (see utils/dom_diff.py).
+    """
+    prompt = screen + "\n"
+    prompt += """
+### ACTIONS AVAILABLE (reference elements by ID only)
+open_app(bundle_id), click_element(id), type_in_element(id, text), hotkey(keys), wait(seconds), finish(),
+click_text(text, role?), type_into_labeled(label, text), focus_role(role, text?, index?),
+fill_and_submit(fields, submit?, expect?), select_menu_path(path), repeat(action, ids, text?)
+
+### RESPONSE FORMAT: valid JSON only
+{"current_state": {"evaluation_previous_goal": "Success|Failed|Unknown - why", "memory": "...", "next_goal": "..."}, "actions": [{"click_element": {"id": 1}}, {"type_in_element": {"id": 7, "text": "new text"}}]}
 
+### GOAL: """ + task + """
+### GENERAL STEPS: """ + "\n".join([f"{i+1}. {step}" for i, step in enumerate(plan_steps)]) + """
+### ACTIONS TAKEN SO FAR:\n"""
+    prompt += past_actions.render()
     prompt += """Respond with the next actions to take, including your current state analysis. Only call finish() if the task was already completed, based on the page."""
     return prompt
+default_state = {
+    "evaluation_previous_goal": "Unknown",
+    "memory": "No memory available",
+    "next_goal": "No goal specified"
+}
+
 def get_actions_from_llm(prompt):
-    api_key = os.environ.get("GEMINI_API_KEY")
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}"
-    
-    request_body = {
-        "contents": [{"role": "user", "parts": [{"text": prompt}]}],
-        "generationConfig": {"temperature": 1, "topK": 40, "topP": 0.95, "maxOutputTokens": 4192},
-        "systemInstruction": {
-            "parts": [
-                {"text": system_prompt}
-            ]
-        }
-    }
-    
-    response = requests.post(url, json=request_body)
-    data = response.json()
-    candidates = data.get("candidates", [])
-    text = candidates[0]["content"]["parts"][0]["text"] if candidates else ""
-    
-    # Clean response
-    if "```json" in text:
-        text = text.split("```json", 1)[1]
-    text = text.replace("```", "").strip()
-    if "{" in text and "}" in text:
-        start_idx = text.find("{")
-        end_idx = text.rfind("}") + 1
-        text = text[start_idx:end_idx].strip()
+    with tracing.span("llm", prompt_bytes=len(prompt)):
+        text = llm.generate(prompt, system=system_prompt)
 
     try:
-        response_json = json.loads(text, strict=False) # allows \t and other chars which could cause issues
+        with tracing.span("parse"):
+            response_json = llm.parse_json(text)
         actions = response_json.get("actions", [])
-        current_state = response_json.get("current_state", {
-            "evaluation_previous_goal": "Unknown",
-            "memory": "No memory available",
-            "next_goal": "No goal specified"
-        })
+        current_state = response_json.get("current_state", dict(default_state))
     except Exception as e:
         print(f"Error parsing JSON: {e}, text: {text}")
         actions = []
-        current_state = {
-            "evaluation_previous_goal": "Unknown",
-            "memory": "No memory available",
-            "next_goal": "No goal specified"
-        }
+        current_state = dict(default_state)
     
     return actions, current_state
-def execute_actions(past_actions, actions):
-    updated_actions = past_actions.copy()
+
+class ActionStream:
+    """
+    Streaming counterpart of get_actions_from_llm. Iterating yields each action
+    as soon as the model has finished writing it; actions and current_state
+    are complete once iteration ends.
+    """
+    def __init__(self, prompt):
+        self.prompt = prompt
+        self.actions = []
+        self.current_state = dict(default_state)
+
+    def __iter__(self):
+        parser = ActionStreamParser()
+        text = ""
+        # Time spent waiting on the model, not counting the actions run in between
+        start = resumed = time.perf_counter()
+        waiting = 0.0
+        usage = {}
+        for chunk in llm.stream_generate(self.prompt, system=system_prompt, usage=usage):
+            text += chunk
+            for action in parser.feed(chunk):
+                self.actions.append(action)
+                if len(self.actions) == 1:
+                    tracing.record("llm.first_action", start, time.perf_counter() - start)
+                waiting += time.perf_counter() - resumed
+                yield action
+                resumed = time.perf_counter()
+        waiting += time.perf_counter() - resumed
+        tracing.record("llm", start, waiting, prompt_bytes=len(self.prompt), streamed=True, **usage)
+
+        # Fall back to a full parse for the items the incremental parser never reached
+        try:
+            response_json = llm.parse_json(text)
+        except Exception as e:
+            if not self.actions: print(f"Error parsing JSON: {e}, text: {text}")
+            response_json = {}
+        for action in response_json.get("actions", [])[parser.items:]:
+            self.actions.append(action)
+            yield action
+        self.current_state = parser.current_state or response_json.get("current_state") or self.current_state
+def execute_actions(past_actions, actions, snapshot=None):
+    """
+    Runs actions in order, recording each result in the past_actions ActionLog.
+    Element ids refer to snapshot, the screen the model just saw; once an action
+    takes a fresh snapshot they are mapped onto it (see ScreenIds). click_text,
+    type_into_labeled and focus_role name their target instead of an id; they are
+    resolved against snapshot, or a fresh one once an earlier action may have
+    changed it.
+    """
+    executor = get_executor()
     task_completed = False
+    ids = ScreenIds(executor, snapshot)
+    index = None
+
+    def resolve(find):
+        nonlocal index
+        live = ids.current()
+        if index is None or index.snapshot is not live:
+            index = ElementIndex(live)
+        return find(index)
+
+    def target(element_id):
+        element, error = ids.element(element_id)
+        return (None, f" ({error})") if element is None else (element.clickable_id, "")
     
     for action in actions:
-        if "open_app" in action:
-            bundle_id = action["open_app"]["bundle_id"]
-            result = executor.open_app(bundle_id)
-            status = "✅" if result else "❌ [FAILED]"
-            updated_actions.append(f"{status} Opened app: {bundle_id}")
-        elif "click_element" in action:
-            element_id = action["click_element"]["id"]
-            result = executor.click_element(element_id)
-            status = "✅" if result else "❌ [FAILED]"
-            updated_actions.append(f"{status} Clicked element: {element_id}")
-        elif "type_in_element" in action:
-            element_id = action["type_in_element"]["id"]
-            text = action["type_in_element"]["text"]
-            result = executor.type_in_element(element_id, text)
-            status = "✅" if result else "❌ [FAILED]"
-            updated_actions.append(f"{status} Typed text: {text} into element: {element_id}")
-        elif "hotkey" in action:
-            keys = action["hotkey"]["keys"]
-            result = executor.hotkey(keys)
-            status = "✅" if result else "❌ [FAILED]"
-            updated_actions.append(f"{status} Pressed keys: {keys}")
-        elif "wait" in action:
-            seconds = action["wait"]["seconds"]
-            result = executor.wait(seconds)
-            status = "✅" if result else "❌ [FAILED]"
-            updated_actions.append(f"{status} Waited {seconds} sec")
-        elif "finish" in action:
-            task_completed = True
-            updated_actions.append("Task completed")
+        name = next(iter(action), "unknown") if isinstance(action, dict) else "unknown"
+        with tracing.span("action." + name, params=action.get(name) if isinstance(action, dict) else None) as action_span:
+            logged = len(past_actions)
+            if "open_app" in action:
+                bundle_id = action["open_app"]["bundle_id"]
+                result = executor.open_app(bundle_id)
+                status = "✅" if result else "❌ [FAILED]"
+                past_actions.add(action, f"{status} Opened app: {bundle_id}", result)
+            elif "click_element" in action:
+                element_id = action["click_element"]["id"]
+                live_id, note = target(element_id)
+                result = live_id is not None and executor.click_element(live_id)
+                status = "✅" if result else "❌ [FAILED]"
+                past_actions.add(action, f"{status} Clicked element: {element_id}{note}", result)
+            elif "type_in_element" in action:
+                element_id = action["type_in_element"]["id"]
+                text = action["type_in_element"]["text"]
+                live_id, note = target(element_id)
+                result = live_id is not None and executor.type_in_element(live_id, text)
+                status = "✅" if result else "❌ [FAILED]"
+                past_actions.add(action, f"{status} Typed text: {text} into element: {element_id}{note}", result)
+            elif "hotkey" in action:
+                keys = action["hotkey"]["keys"]
+                result = executor.hotkey(keys)
+                status = "✅" if result else "❌ [FAILED]"
+                past_actions.add(action, f"{status} Pressed keys: {keys}", result)
+            elif "wait" in action:
+                seconds = action["wait"]["seconds"]
+                result = executor.wait(seconds)
+                status = "✅" if result else "❌ [FAILED]"
+                past_actions.add(action, f"{status} Waited {seconds} sec", result)
+            elif "click_text" in action:
+                params = action["click_text"]
+                found = resolve(lambda index: index.find(params.get("text", ""), params.get("role")))
+                result = bool(found) and executor.click_element(found.element.clickable_id)
+                status = "✅" if result else "❌ [FAILED]"
+                past_actions.add(action, f"{status} Clicked {params.get('text')!r}: {found.message()}", result)
+            elif "type_into_labeled" in action:
+                params = action["type_into_labeled"]
+                text = params.get("text", "")
+                found = resolve(lambda index: index.find_labeled(params.get("label", "")))
+                result = bool(found) and executor.type_in_element(found.element.clickable_id, text)
+                status = "✅" if result else "❌ [FAILED]"
+                past_actions.add(action, f"{status} Typed text: {text} into {params.get('label')!r}: {found.message()}", result)
+            elif "focus_role" in action:
+                params = action["focus_role"]
+                found = resolve(lambda index: index.find_role(params.get("role", ""), params.get("text"), params.get("index")))
+                result = bool(found) and executor.click_element(found.element.clickable_id)
+                status = "✅" if result else "❌ [FAILED]"
+                past_actions.add(action, f"{status} Focused {params.get('role')}: {found.message()}", result)
+            elif name in compound.ACTIONS:
+                outcome = compound.run(executor, name, action[name], ids)
+                status = "✅" if outcome.ok else "❌ [FAILED]"
+                past_actions.add(action, f"{status} {outcome.describe()}", outcome.ok, steps=outcome.steps)
+                action_span.set("steps", outcome.steps)
+            elif "finish" in action:
+                task_completed = True
+                past_actions.add(action, "Task completed")
+            if len(past_actions) > logged:
+                action_span.set("result", past_actions[-1])
+            if not ("finish" in action or "wait" in action):
+                ids.changed() # the screen may have changed
     
-    return [task_completed, updated_actions]
+    return [task_completed, past_actions]
 
-def get_initial_dom_str():
-    dom_str = "### Active app: NO_APP\n"
+def get_initial_snapshot():
+    apps = []
     try:
-        app_list = subprocess.check_output(["osascript", "-e", 'tell application "System Events" to get name of every process whose background only is false']).decode().strip()
-        bundle_ids = subprocess.check_output(["osascript", "-e", 'tell application "System Events" to get bundle identifier of every process whose background only is false']).decode().strip()
+        # Both queries are started before either is read so they run side by side
+        names_proc = subprocess.Popen(["osascript", "-e", 'tell application "System Events" to get name of every process whose background only is false'], stdout=subprocess.PIPE)
+        ids_proc = subprocess.Popen(["osascript", "-e", 'tell application "System Events" to get bundle identifier of every process whose background only is false'], stdout=subprocess.PIPE)
+        app_list = names_proc.communicate()[0].decode().strip()
+        bundle_ids = ids_proc.communicate()[0].decode().strip()
         app_names = app_list.split(", ")
         app_bundle_ids = bundle_ids.split(", ")        
-        dom_str += "\n### Mac app bundleids:\n"
-        for app_name, bundle_id in zip(app_names, app_bundle_ids):
-            if bundle_id:
-                dom_str += f"{app_name}, {bundle_id}\n"
+        apps = [(app_name, bundle_id) for app_name, bundle_id in zip(app_names, app_bundle_ids) if bundle_id]
     except Exception as e:
         print(f"Error getting app list: {e}")
-    return dom_str
-initial = get_initial_dom_str()
+    return DOMSnapshot("NO_APP", "", apps=apps)
+
+def get_start_context():
+    """Takes a fresh running-app snapshot and loads the app context that goes with it."""
+    snapshot = get_initial_snapshot()
+    current_bundle_id = next((bundle_id for _, bundle_id in snapshot.apps if bundle_id.count(".") > 1), None)
+    app_context = get_app_context(current_bundle_id) if current_bundle_id else ""
+    return snapshot, app_context
+
+def plan_task(task):
+    with tracing.span("plan"):
+        return planner.plan(task)
+
+def run_routed(task):
+    """
+    Runs task through the local router (utils/router.py) when it resolves it
+    without a model. None means it needs the planner and the LLM.
+    """
+    seen = []
+    def snapshot():
+        seen.append(get_executor().get_snapshot())
+        return seen[-1]
+    with tracing.span("route") as route_span:
+        routed = router.route(task, running=lambda: get_initial_snapshot().apps, snapshot=snapshot)
+        route_span.set("intent", routed.intent if routed else None)
+    if routed is None:
+        return None
+    print(f"⚡ Handled locally ({routed.intent}), skipping the planner and LLM")
+    is_task_complete, past_actions = execute_actions(ActionLog(), routed.actions, seen[-1] if seen else None)
+    if any(entry.startswith("❌") for entry in past_actions):
+        print("↩️ Fast path failed, falling back to the LLM")
+        return None
+    print(f"\n✨ Task Completed Successfully ✨\n📝 Summary: {routed.summary}")
+    return is_task_complete, routed.summary, "\n".join(past_actions)
 
-def run(task, debug=False, speak=True, use_maya=False):
+def run(task, debug=False, speak=True, use_maya=False, stream=True, cancel=None, on_progress=None):
+    """
+    Runs task to completion or max_iterations. Simple commands ("open Safari",
+    "press cmd+t") are resolved locally and skip the planner and the LLM. cancel is an optional threading.Event;
+    once set, the run stops before its next iteration (used by utils/jobs.py).
+    on_progress, if given, is called from the running thread after every iteration
+    with a dict: iteration, max_iterations, state (evaluation/memory/next_goal),
+    next_goal, actions (this iteration's results), complete, and timings (seconds
+    for the iteration and since the start).
+    """
+    with tracing.trace_task(task) as task_span:
+        routed = run_routed(task)
+        task_span.set("routed", routed is not None)
+        if routed is not None:
+            is_task_complete, summary, actions_log = routed
+        else:
+            is_task_complete, summary, actions_log = run_task(task, debug, speak, stream, cancel, on_progress)
+        task_span.set("completed", is_task_complete)
+    return is_task_complete, summary, actions_log
+
+def report_progress(on_progress, event):
+    try:
+        on_progress(event)
+    except Exception as e: # a broken listener shouldn't stop the task
+        print(f"⚠️ Progress callback failed: {e}")
+
+def run_task(task, debug, speak, stream, cancel=None, on_progress=None):
     max_iterations = 20
+    started = time.perf_counter()
     is_task_complete = False
-    past_actions = []
-    dom_str = initial
-    plan_steps = planner.plan(task)
-    print(f"✅ Planned {len(plan_steps)} general steps to accomplish the goal.")
-    
-    # Try to extract the current bundle id from dom_str
-    current_bundle_id = None
-    for line in dom_str.splitlines():
-        if ", " in line and line.count(".") > 1:  # crude check for bundle id
-            parts = line.split(", ")
-            if len(parts) == 2:
-                current_bundle_id = parts[1].strip()
-                break
+    past_actions = ActionLog()
+    plan_steps = []
 
-    app_context = get_app_context(current_bundle_id) if current_bundle_id else ""
+    # Planning runs in the background while we snapshot the screen. The first action
+    # request doesn't wait for it (with no app open it is almost always open_app), so
+    # the plan is only joined from the second iteration on, or earlier if it's ready.
+    plan_future = startup_pool.submit(tracing.bind(plan_task), task)
+    if executor is None:
+        startup_pool.submit(tracing.bind(get_executor)) # first task only: load the executor alongside planning
+    with tracing.span("start_context"):
+        snapshot, app_context = get_start_context()
 
     # Initialize state tracking
     current_state = {
         "evaluation_previous_goal": "Not started",
         "memory": "Task just started",
-        "next_goal": plan_steps[0] if plan_steps else "No specific steps planned"
+        "next_goal": "No specific steps planned"
     }
 
     # No need to call announce_task_plan - we're sending the command directly to Maya
 
+    # Replay a previously successful run for as long as the screen keeps matching it
+    replay = trajectory.lookup(task)
+    recorded = []
+    any_failed = replay_failed = False
+
+    # After the first full prompt, later turns on the same app get the short follow-up
+    # prompt, which also says what changed on screen since the last turn
+    differ = DomDiffer()
+    # Busy screens are cut down to the elements most relevant to the goal; a failed
+    # turn widens the cut for the retry
+    ranker = ElementRanker()
+
     for iteration in range(max_iterations):
-        prompt = ""
-        if app_context:
-            prompt += f"### APP CONTEXT:\n{app_context}\n\n"
-        prompt += format_prompt(dom_str, past_actions, plan_steps, task)
-        actions, new_state = get_actions_from_llm(prompt)
+        if cancel is not None and cancel.is_set():
+            break
+        iteration_started = time.perf_counter()
+        fingerprint = trajectory.fingerprint(snapshot)
+        actions_before = len(past_actions)
+        replay_step = replay[iteration] if replay and iteration < len(replay) else None
+        executed = False
         
-        # Update state information
-        current_state = new_state
+        if replay_step and replay_step["fingerprint"] == fingerprint:
+            print(f"⚡ Replaying recorded step {iteration + 1}/{len(replay)}")
+            actions = replay_step["actions"]
+            current_state = {
+                "evaluation_previous_goal": "Replayed - screen matches the recorded run",
+                "memory": f"Replaying step {iteration + 1} of {len(replay)} from a previous successful run",
+                "next_goal": "Continue the recorded run"
+            }
+            is_task_complete, past_actions = execute_actions(past_actions, actions, snapshot)
+            executed = True
+            differ.reset() # the model hasn't seen this step, so the next prompt starts over
+        else:
+            if replay:
+                print("↩️ Screen differs from the recorded run, falling back to the LLM")
+                replay = None
+            if plan_future and (iteration > 0 or plan_future.done()):
+                plan_steps = plan_future.result()
+                plan_future = None
+                print(f"✅ Planned {len(plan_steps)} general steps to accomplish the goal.")
+            with tracing.span("prompt") as prompt_span:
+                elements, omitted = ranker.select(snapshot, task, plan_steps, current_state.get("next_goal", ""))
+                screen, is_full = differ.render(snapshot, elements, omitted)
+                prompt = f"### APP CONTEXT:\n{app_context}\n\n" if app_context else ""
+                if is_full:
+                    prompt += format_prompt(screen, past_actions, plan_steps, task)
+                else:
+                    prompt += format_followup_prompt(screen, past_actions, plan_steps, task)
+                prompt_span.set("full", is_full)
+                prompt_span.set("elements", len(elements))
+                prompt_span.set("omitted", omitted)
+                prompt_span.set("tokens", estimate_tokens(prompt))
+            if stream:
+                # Actions start executing while the rest of the response is still streaming in
+                response = ActionStream(prompt)
+                is_task_complete, past_actions = execute_actions(past_actions, response, snapshot)
+                actions, current_state = response.actions, response.current_state
+                executed = True
+            else:
+                actions, current_state = get_actions_from_llm(prompt)
         
         if debug: print("json_actions =", actions, "\n", "current_state =", current_state, "\n")    
         
@@ -296,18 +525,45 @@ def run(task, debug=False, speak=True, use_maya=False):
         print(f"🧠 Memory: {current_state['memory']}")
         print(f"🎯 Next Goal: {current_state['next_goal']}")
         
-        is_task_complete, past_actions = execute_actions(past_actions, actions)
+        if not executed:
+            is_task_complete, past_actions = execute_actions(past_actions, actions, snapshot)
+        recorded.append({"fingerprint": fingerprint, "actions": actions})
+        failed = any(entry.startswith("❌") for entry in past_actions[actions_before:])
+        any_failed = any_failed or failed
+        if failed or current_state.get("evaluation_previous_goal", "").startswith("Failed"):
+            ranker.widen()
+        replay_failed = replay_failed or (failed and replay_step is not None and replay is not None)
+        if on_progress:
+            report_progress(on_progress, {
+                "iteration": iteration + 1,
+                "max_iterations": max_iterations,
+                "state": dict(current_state),
+                "next_goal": current_state.get("next_goal", ""),
+                "actions": list(past_actions[actions_before:]),
+                "complete": is_task_complete,
+                "timings": {"iteration": time.perf_counter() - iteration_started, "elapsed": time.perf_counter() - started},
+            })
         if is_task_complete: break
-        dom_str = executor.get_dom_str()
+        with tracing.span("dom") as dom_span:
+            snapshot = get_executor().get_snapshot()
+            dom_span.set("app", snapshot.bundle_id)
+            dom_span.set("element_count", len(snapshot.elements))
+            dom_span.set("clickable_count", len(snapshot.clickable()))
         print("---------------")
     
+    # Only clean runs are worth replaying; a recorded run that failed on replay is stale
+    if is_task_complete and not any_failed:
+        trajectory.store(task, recorded)
+    elif replay_failed:
+        trajectory.invalidate(task)
+
     # Print final task summary
     if is_task_complete:
         print("\n✨ Task Completed Successfully ✨")
         print(f"📋 Final State: {current_state['evaluation_previous_goal']}")
         print(f"📝 Summary: {current_state['memory']}")
     else:
-        print("\n⚠️ Maximum iterations reached without task completion")
+        print("\n🛑 Task cancelled before completion" if cancel is not None and cancel.is_set() else "\n⚠️ Maximum iterations reached without task completion")
         print(f"📋 Current State: {current_state['evaluation_previous_goal']}")
         print(f"📝 Progress: {current_state['memory']}")
         print(f"🔄 Next Step: {current_state['next_goal']}")
@@ -315,7 +571,7 @@ def run(task, debug=False, speak=True, use_maya=False):
     return is_task_complete, current_state['memory'], "\n".join(past_actions)
 
 # Function that can be called by external scripts like discord-bot.py
-def execute_command(command, use_narrator=True, use_maya=True):
+def execute_command(command, use_narrator=True, use_maya=True, on_output=None, cancel=None):
     """
     Execute a command with optional narrator and Maya integration.
     
@@ -323,6 +579,8 @@ def execute_command(command, use_narrator=True, use_maya=True):
         command: The command to execute
         use_narrator: Whether to use the narrator for audio feedback
         use_maya: Whether to use Maya for voice interaction
+        on_output: Optional callback(stream, line) for Claude Code's output as it streams
+        cancel: Optional threading.Event that stops the command (see run and claude_code)
         
     Returns:
         Tuple of (is_complete, summary, actions_log)
@@ -333,7 +591,9 @@ def execute_command(command, use_narrator=True, use_maya=True):
     # Check if this is a direct Claude command with prefix
     if command.lower().startswith('claude:'):
         # Handle the command with Claude Code
-        is_complete, summary, actions_log = claude_code.handle_coding_task(command, debug=True)
+        with tracing.trace_task(command), tracing.span("claude_code") as claude_span:
+            is_complete, summary, actions_log = claude_code.handle_coding_task(command, debug=True, on_output=on_output, cancel=cancel)
+            claude_span.set("completed", is_complete)
         print(f"\n{'✨ Task Completed Successfully ✨' if is_complete else '⚠️ Task could not be completed'}")
         print(f"📝 Claude Code Status: {summary}")
         return is_complete, summary, actions_log
@@ -356,7 +616,7 @@ def execute_command(command, use_narrator=True, use_maya=True):
         time.sleep(2)
     
     # Run the command
-    is_complete, summary, actions_log = run(command, debug=False, speak=use_narrator, use_maya=False)
+    is_complete, summary, actions_log = run(command, debug=False, speak=use_narrator, use_maya=False, cancel=cancel)
     
     # Have Maya announce completion if enabled
     if use_maya:
@@ -0,0 +1,310 @@
+#! /usr/bin/env python3
+"""
+Per-stage latency (and prompt token) benchmark for agent.run().
+
+Drives run() against a local mock Gemini server (configurable latency) and the
+headless UI simulator, then reports p50/p95/p99 per stage (planning, prompt
+building, LLM call, parsing, each executor action, DOM capture) across many
+synthetic tasks. Results are saved as JSON so runs can be compared across commits:
+
+    python -m bench.agent_bench --tasks 60 --llm-latency 0.4
+    python -m bench.agent_bench --compare bench/results/agent_bench-<commit>.json
+"""
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from contextlib import redirect_stdout
+import subprocess
+import threading
+import argparse
+import tempfile
+import random
+import math
+import json
+import time
+import sys
+import os
+import re
+
+# Each family is a scenario plus the scripted responses the mock model gives, one
+# list of actions per turn. {"label": ...} in place of an id is resolved by the mock
+# server against the element lines the agent sent it.
+FAMILIES = [
+    {
+        "scenario": "sim/messages.json",
+        "task": "Send a text to CS 153 group chat saying bench message {n}",
+        "script": [
+            [{"open_app": {"bundle_id": "com.apple.MobileSMS"}}],
+            [{"click_element": {"label": "CS 153 group chat"}}],
+            [{"type_in_element": {"label": "placeholder=iMessage", "text": "bench message {n}"}}, {"hotkey": {"keys": ["enter"]}}],
+            [{"finish": {}}],
+        ],
+    },
+    {
+        "scenario": "sim/notes.json",
+        "task": "Make a new note that says benchmark run {n}",
+        "script": [
+            [{"open_app": {"bundle_id": "com.apple.Notes"}}],
+            [{"hotkey": {"keys": ["cmd", "n"]}}],
+            [{"type_in_element": {"label": "Note Body Text View", "text": "benchmark run {n}"}}, {"finish": {}}],
+        ],
+    },
+    {
+        "scenario": "sim/notes.json",
+        "task": "Create a folder called bench{n} in my documents folder",
+        "script": [
+            [{"open_app": {"bundle_id": "com.apple.finder"}}],
+            [{"click_element": {"label": "Documents"}}],
+            [{"hotkey": {"keys": ["cmd", "shift", "n"]}}],
+            [{"type_in_element": {"label": "untitled folder", "text": "bench{n}"}}],
+            [{"finish": {}}],
+        ],
+    },
+]
+
+def count_tokens(body):
+    """Stand-in for Gemini's promptTokenCount: ~4 characters per token over everything sent."""
+    texts = [part.get("text", "") for part in (body.get("systemInstruction") or {}).get("parts", [])]
+    texts += [part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", [])]
+    return sum((len(text) + 3) // 4 for text in texts)
+
+class MockGemini:
+    """
+    Serves generateContent / streamGenerateContent from the task scripts, with
+    usageMetadata so the agent's token accounting can be checked.
+    """
+    def __init__(self, latency, jitter, chunk_delay, chunk_size=40):
+        self.latency = latency
+        self.jitter = jitter
+        self.chunk_delay = chunk_delay
+        self.chunk_size = chunk_size
+        self.scripts = {}
+        self.progress = {}
+        self.lock = threading.Lock()
+
+    def add_task(self, task, script, n):
+        self.scripts[task] = json.loads(json.dumps(script).replace("{n}", str(n)))
+        self.progress[task] = 0
+
+    def respond(self, body):
+        turns = [part.get("text", "") for content in body.get("contents", []) if content.get("role") == "user" for part in content.get("parts", [])]
+        if "Create a detailed step-by-step plan" in turns[-1]:
+            return json.dumps({"steps": ["Open the app", "Do the task", "Verify it worked"]})
+        text = "\n".join(turns)
+        task = next((task for task in self.scripts if f"### GOAL: {task}\n" in text), None)
+        if task is None:
+            return json.dumps({"current_state": {}, "actions": [{"finish": {}}]})
+        with self.lock:
+            step = self.progress[task]
+            self.progress[task] += 1
+        script = self.scripts[task]
+        actions = json.loads(json.dumps(script[min(step, len(script) - 1)]))
+        for action in actions:
+            for params in action.values():
+                if "label" in params:
+                    params["id"] = self.resolve(turns, params.pop("label"))
+        return json.dumps({
+            "current_state": {
+                "evaluation_previous_goal": "Success - scripted",
+                "memory": f"Step {step + 1} of {len(script)}",
+                "next_goal": "Continue the script",
+            },
+            "actions": actions,
+        })
+
+    def resolve(self, turns, label):
+        pattern = re.compile(r"\[(\d+)\]<\w+>[^\n]*" + re.escape(label))
+        for turn in reversed(turns):
+            match = pattern.search(turn)
+            if match:
+                return int(match.group(1))
+        return -1
+
+    def serve(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                text = mock.respond(body)
+                usage = {"promptTokenCount": count_tokens(body), "candidatesTokenCount": (len(text) + 3) // 4}
+                usage["totalTokenCount"] = usage["promptTokenCount"] + usage["candidatesTokenCount"]
+                time.sleep(max(0.0, mock.latency + random.uniform(-mock.jitter, mock.jitter)))
+                if ":streamGenerateContent" in self.path:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for i in range(0, len(text), mock.chunk_size):
+                        event = {"candidates": [{"content": {"parts": [{"text": text[i:i + mock.chunk_size]}]}}]}
+                        if i + mock.chunk_size >= len(text):
+                            event["usageMetadata"] = usage # Gemini reports usage on the last chunk
+                        event = json.dumps(event)
+                        data = f"data: {event}\r\n\r\n".encode("utf-8")
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                        self.wfile.flush()
+                        time.sleep(mock.chunk_delay)
+                    self.wfile.write(b"0\r\n\r\n")
+                else:
+                    data = json.dumps({"candidates": [{"content": {"parts": [{"text": text}]}}], "usageMetadata": usage}).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+def percentile(values, p):
+    """Nearest-rank percentile of a sorted list."""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, math.ceil(p / 100 * len(values)) - 1))
+    return values[index]
+
+def summarize(durations):
+    stages = {}
+    for name, values in sorted(durations.items()):
+        values = sorted(values)
+        stages[name] = {
+            "count": len(values),
+            "mean_ms": 1000 * sum(values) / len(values),
+            "p50_ms": 1000 * percentile(values, 50),
+            "p95_ms": 1000 * percentile(values, 95),
+            "p99_ms": 1000 * percentile(values, 99),
+        }
+    return stages
+
+def summarize_tokens(tokens):
+    """Prompt tokens per model turn, split into full prompts and follow-up turns."""
+    return {kind: {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p50": percentile(sorted(values), 50),
+        "max": max(values),
+    } for kind, values in tokens.items() if values}
+
+def print_tokens(tokens, baseline=None):
+    for kind, stats in tokens.items():
+        line = f"prompt tokens, {kind + ' turns':<16}{stats['count']:>5} turns, mean {stats['mean']:7.1f}, p50 {stats['p50']:5d}, max {stats['max']:5d}"
+        if baseline and kind in baseline:
+            before = baseline[kind]["mean"]
+            line += f"  ({stats['mean'] - before:+.1f}, {(stats['mean'] - before) / before * 100:+.1f}% vs baseline)"
+        print(line)
+
+def print_table(stages, baseline=None):
+    print(f"{'stage':<24}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}" + ("  Δp50 vs baseline" if baseline else ""))
+    for name, stats in stages.items():
+        line = f"{name:<24}{stats['count']:>7}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+        if baseline and name in baseline:
+            before = baseline[name]["p50_ms"]
+            change = (stats["p50_ms"] - before) / before * 100 if before else 0.0
+            line += f"  {stats['p50_ms'] - before:+.2f} ms ({change:+.1f}%)"
+        print(line)
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return "unknown"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=30, help="number of synthetic tasks to run")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="mock model latency before the first byte (s)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="uniform +/- jitter on the mock latency (s)")
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="delay between streamed chunks (s)")
+    parser.add_argument("--time-scale", type=float, default=0.0, help="1 sleeps the simulator's macOS latencies for real, 0 only counts them")
+    parser.add_argument("--no-stream", action="store_true", help="use the blocking generateContent path")
+    parser.add_argument("--cold", action="store_true", help="clear the plan and trajectory caches before every task")
+    parser.add_argument("--output", help="where to write results (default bench/results/agent_bench-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to diff against")
+    parser.add_argument("--verbose", action="store_true", help="show the agent's own output")
+    args = parser.parse_args()
+
+    mock = MockGemini(args.llm_latency, args.jitter, args.chunk_delay)
+    server = mock.serve()
+    os.environ["GEMINI_API_BASE"] = f"http://127.0.0.1:{server.server_port}/v1beta"
+    os.environ.setdefault("GEMINI_API_KEY", "bench")
+    os.environ.setdefault("ZEUS_CACHE_DIR", tempfile.mkdtemp(prefix="zeus-bench-"))
+    os.environ["ZEUS_EXECUTOR"] = f"sim:{FAMILIES[0]['scenario']}"
+
+    import agent
+    import utils.tracing as tracing
+    import utils.plan_cache as plan_cache
+    import utils.trajectory as trajectory
+    from utils.executor import Executor
+    from utils.simulator import SimulatedBackend
+
+    durations = {}
+    tokens = {"full": [], "follow-up": []}
+    turn = [None] # kind of the prompt the next llm span answers
+    def recorder(name, start, duration, attributes):
+        durations.setdefault(name, []).append(duration)
+        if name == "prompt":
+            turn[0] = "full" if attributes.get("full") else "follow-up"
+        elif name == "llm" and turn[0] and "prompt_tokens" in attributes:
+            tokens[turn[0]].append(attributes["prompt_tokens"])
+    tracing.add_recorder(recorder)
+
+    completed = 0
+    simulated_seconds = []
+    output = sys.stdout if args.verbose else open(os.devnull, "w")
+    for n in range(args.tasks):
+        family = FAMILIES[n % len(FAMILIES)]
+        task = family["task"].format(n=n)
+        mock.add_task(task, family["script"], n)
+        backend = SimulatedBackend.from_file(family["scenario"], time_scale=args.time_scale)
+        agent.executor = Executor(backend)
+        if args.cold:
+            plan_cache.invalidate()
+            trajectory.cache.clear()
+        with redirect_stdout(output):
+            is_complete, _, _ = agent.run(task, speak=False, stream=not args.no_stream)
+        completed += bool(is_complete)
+        simulated_seconds.append(backend.simulated_seconds)
+        print(f"\r{n + 1}/{args.tasks} tasks", end="", file=sys.stderr)
+    print(file=sys.stderr)
+    tracing.remove_recorder(recorder)
+    server.shutdown()
+
+    stages = summarize(durations)
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "args": vars(args),
+        },
+        "tasks": {
+            "total": args.tasks,
+            "completed": completed,
+            "simulated_macos_seconds_mean": sum(simulated_seconds) / len(simulated_seconds) if simulated_seconds else 0.0,
+        },
+        "stages": stages,
+        "prompt_tokens": summarize_tokens(tokens),
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+    print_table(stages, baseline and baseline["stages"])
+    print()
+    print_tokens(results["prompt_tokens"], baseline and baseline.get("prompt_tokens"))
+    print(f"\n{completed}/{args.tasks} tasks completed, "
+          f"{results['tasks']['simulated_macos_seconds_mean']:.2f}s simulated macOS latency per task")
+
+    path = args.output or os.path.join("bench", "results", f"agent_bench-{results['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"📄 Results written to {path}")
+
+if __name__ == "__main__":
+    main()
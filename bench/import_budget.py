@@ -0,0 +1,68 @@
+#! /usr/bin/env python3
+"""
+Cold-import time budget. Imports each module in a fresh interpreter under
+`python -X importtime`, prints the slowest imports it pulled in, and exits 1 when a
+module's cumulative import time is over its budget, so heavy imports or import-time
+side effects creeping back in fail loudly:
+
+    python -m bench.import_budget
+    python -m bench.import_budget agent --budget-ms 300 --runs 5
+"""
+import subprocess
+import argparse
+import sys
+import os
+
+# Cumulative cold-import budget per module, in milliseconds
+BUDGETS = {
+    "agent": 600,
+    "utils.narrator": 300,
+    "utils.speech": 400,
+}
+
+def import_times(module, env=None):
+    """Returns {imported module: (self_us, cumulative_us)} for one cold import of module."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", help=f"modules to check (default: {', '.join(BUDGETS)})")
+    parser.add_argument("--budget-ms", type=float, help="budget for every module, overriding the defaults")
+    parser.add_argument("--runs", type=int, default=3, help="imports per module; the fastest one counts")
+    parser.add_argument("--top", type=int, default=8, help="how many of the slowest imports to list")
+    args = parser.parse_args()
+
+    # Keep the import side-effect free where it can be: no traces, no real executor
+    env = dict(os.environ, ZEUS_TRACE="0", ZEUS_VOICE="0")
+    over = []
+    for module in args.modules or list(BUDGETS):
+        budget = args.budget_ms or BUDGETS.get(module, 500)
+        try:
+            runs = [import_times(module, env) for _ in range(max(1, args.runs))]
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            over.append(module)
+            continue
+        times = min(runs, key=lambda run: run.get(module, (0, 0))[1])
+        total_ms = times.get(module, (0, 0))[1] / 1000
+        status = "✅" if total_ms <= budget else "❌"
+        print(f"{status} {module}: {total_ms:.1f} ms (budget {budget:.0f} ms)")
+        slowest = sorted(times.items(), key=lambda item: -item[1][0])[:args.top]
+        for name, (self_us, cumulative_us) in slowest:
+            print(f"    {self_us / 1000:8.1f} ms self {cumulative_us / 1000:8.1f} ms total  {name}")
+        if total_ms > budget:
+            over.append(module)
+    sys.exit(1 if over else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#! /usr/bin/env python3
+"""
+Speech pipeline benchmark over recorded WAV fixtures.
+
+Each fixture is replayed through the same path as live listening (ring buffer,
+VAD, wake-word stage, command transcription: utils.speech.CommandRecognizer) for
+every model size / compute type combination. Reported per combination: real-time
+factor, end-of-speech-to-command latency (silence wait plus transcription),
+wake-phrase hit and false-trigger rates, word error rate, CPU time and peak RSS.
+Each combination runs in its own process so memory numbers don't mix.
+
+    python -m bench.speech_bench --models tiny.en,base.en,small --compute float32,int8
+    python -m bench.speech_bench --record bench/speech_fixtures/open_safari.wav --seconds 5
+
+Fixtures are listed in <fixtures>/manifest.json:
+
+    {"fixtures": [
+      {"file": "open_safari.wav", "command": "open safari"},
+      {"file": "tv_in_background.wav", "command": null}
+    ]}
+
+"command" is what should be recognized after the wake phrase; null marks audio
+that must not trigger. WAVs should be 16-bit; other rates are resampled to 16 kHz.
+"""
+from bench.agent_bench import percentile, git_commit
+import subprocess
+import resource
+import argparse
+import json
+import time
+import sys
+import os
+
+def word_error_rate(expected, actual):
+    """Word-level Levenshtein distance over the expected word count."""
+    expected, actual = expected.lower().split(), actual.lower().split()
+    row = list(range(len(actual) + 1))
+    for i, word in enumerate(expected, 1):
+        previous, row[0] = row[0], i
+        for j, other in enumerate(actual, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (word != other))
+    return row[-1] / max(1, len(expected))
+
+def normalize(text):
+    from utils.wakeword import normalize as normalize_words
+    return normalize_words(text or "")
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024 # bytes on macOS, KiB on Linux
+
+def run_fixture(path, wake_model, command_model, rate):
+    """Replays one WAV; returns the command (or None) with timings."""
+    from utils.audio import ArraySource, read_wav
+    from utils.speech import CommandRecognizer
+
+    timings = {}
+    class TimedRecognizer(CommandRecognizer):
+        def transcribe(self, start, end):
+            timings["speech_end"] = end
+            timings["command_seconds"] = (end - start) / self.rate
+            started = time.perf_counter()
+            text = super().transcribe(start, end)
+            timings["transcribe"] = time.perf_counter() - started
+            return text
+
+    samples = read_wav(path, rate)
+    source = ArraySource(samples, rate=rate).start()
+    recognizer = TimedRecognizer(source, wake_model, command_model, on_partial=lambda text: timings.setdefault("first_partial", time.perf_counter()), rate=rate)
+    started = time.perf_counter()
+    command = None
+    while command is None and not source.exhausted:
+        command = recognizer.feed(source.read()) or None
+    elapsed = time.perf_counter() - started
+    result = {
+        "audio_seconds": len(samples) / rate,
+        "processing_seconds": elapsed,
+        "wake_checks": recognizer.detector.checks,
+        "command": command,
+    }
+    if command is not None:
+        # Latency a live user would see: the silence the recognizer waited out after
+        # speech ended, plus the time it took to transcribe
+        waited = (recognizer.ring.total - timings["speech_end"]) / rate
+        result["latency_seconds"] = waited + timings["transcribe"]
+        result["command_rtf"] = timings["transcribe"] / max(timings["command_seconds"], 1e-6)
+    return result
+
+def worker(args):
+    """Runs every fixture for one model / compute type; prints a JSON summary."""
+    from utils.audio import RATE
+    from utils.speech import get_model
+
+    fixtures_dir = args.fixtures
+    with open(os.path.join(fixtures_dir, "manifest.json"), "r") as f:
+        fixtures = json.load(f)["fixtures"]
+
+    cpu_start = time.process_time()
+    load_start = time.perf_counter()
+    wake_model = get_model(args.wake_model, args.worker_compute)
+    command_model = get_model(args.worker_model, args.worker_compute)
+    load_seconds = time.perf_counter() - load_start
+
+    results = []
+    for fixture in fixtures:
+        path = os.path.join(fixtures_dir, fixture["file"])
+        if not os.path.exists(path):
+            print(f"missing fixture {path}", file=sys.stderr)
+            continue
+        result = run_fixture(path, wake_model, command_model, RATE)
+        result["file"] = fixture["file"]
+        result["expected"] = fixture.get("command")
+        if result["expected"] is not None and result["command"] is not None:
+            result["wer"] = word_error_rate(normalize(result["expected"]), normalize(result["command"]))
+        results.append(result)
+
+    wake_fixtures = [result for result in results if result["expected"] is not None]
+    ambient_fixtures = [result for result in results if result["expected"] is None]
+    latencies = sorted(result["latency_seconds"] for result in results if "latency_seconds" in result)
+    errors = [result["wer"] for result in results if "wer" in result]
+    audio = sum(result["audio_seconds"] for result in results)
+    summary = {
+        "model": args.worker_model,
+        "wake_model": args.wake_model,
+        "compute_type": args.worker_compute,
+        "fixtures": len(results),
+        "load_seconds": load_seconds,
+        "rtf": sum(result["processing_seconds"] for result in results) / audio if audio else 0.0,
+        "command_rtf": sum(result.get("command_rtf", 0.0) for result in results) / max(1, len(latencies)),
+        "latency_p50_ms": 1000 * percentile(latencies, 50),
+        "latency_p95_ms": 1000 * percentile(latencies, 95),
+        "wake_hit_rate": sum(result["command"] is not None for result in wake_fixtures) / len(wake_fixtures) if wake_fixtures else 0.0,
+        "false_trigger_rate": sum(result["command"] is not None for result in ambient_fixtures) / len(ambient_fixtures) if ambient_fixtures else 0.0,
+        "wer": sum(errors) / len(errors) if errors else None,
+        "cpu_seconds": time.process_time() - cpu_start,
+        "peak_rss_mb": peak_rss_mb(),
+        "results": results,
+    }
+    print(json.dumps(summary))
+
+def record(path, seconds):
+    """Records a fixture from the microphone."""
+    import numpy as np
+    import wave
+    from utils.audio import Capture, RATE
+    capture = Capture().start()
+    print(f"🎙️ Recording {seconds}s to {path}...")
+    chunks, total = [], 0
+    try:
+        while total < seconds * RATE:
+            chunk = capture.read(timeout=1.0)
+            if chunk is not None:
+                chunks.append(chunk)
+                total += len(chunk)
+    finally:
+        capture.stop()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(RATE)
+        f.writeframes(np.concatenate(chunks).tobytes())
+    print(f"✅ Saved {path}; add it to the manifest with the command it should yield")
+
+def print_table(summaries):
+    print(f"{'model':<12}{'compute':<10}{'RTF':>7}{'cmd RTF':>9}{'p50 ms':>9}{'p95 ms':>9}{'wake hit':>10}{'false':>7}{'WER':>7}{'CPU s':>8}{'RSS MB':>8}")
+    for summary in summaries:
+        wer = f"{summary['wer']:.2f}" if summary["wer"] is not None else "-"
+        print(f"{summary['model']:<12}{summary['compute_type']:<10}{summary['rtf']:>7.3f}{summary['command_rtf']:>9.3f}"
+              f"{summary['latency_p50_ms']:>9.0f}{summary['latency_p95_ms']:>9.0f}{summary['wake_hit_rate']:>10.0%}"
+              f"{summary['false_trigger_rate']:>7.0%}{wer:>7}{summary['cpu_seconds']:>8.1f}{summary['peak_rss_mb']:>8.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=os.path.join("bench", "speech_fixtures"), help="directory holding manifest.json and the WAVs")
+    parser.add_argument("--models", default="small", help="comma-separated command model sizes")
+    parser.add_argument("--compute", default="float32,int8", help="comma-separated compute types")
+    parser.add_argument("--wake-model", default="tiny.en", help="model for the wake-word stage")
+    parser.add_argument("--output", help="where to write results (default bench/results/speech_bench-<commit>.json)")
+    parser.add_argument("--record", help="record a fixture WAV to this path instead of benchmarking")
+    parser.add_argument("--seconds", type=float, default=5.0, help="length of a --record take")
+    parser.add_argument("--worker-model", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-compute", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.record:
+        return record(args.record, args.seconds)
+    if args.worker_model:
+        return worker(args)
+
+    summaries = []
+    for model in args.models.split(","):
+        for compute_type in args.compute.split(","):
+            print(f"⏱️ {model} / {compute_type}...", file=sys.stderr)
+            command = [sys.executable, "-m", "bench.speech_bench", "--fixtures", args.fixtures, "--wake-model", args.wake_model,
+                       "--worker-model", model, "--worker-compute", compute_type]
+            result = subprocess.run(command, capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"❌ {model} / {compute_type} failed:\n{result.stderr.strip()}", file=sys.stderr)
+                continue
+            summaries.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    print_table(summaries)
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "args": vars(args),
+        },
+        "runs": summaries,
+    }
+    path = args.output or os.path.join("bench", "results", f"speech_bench-{results['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"📄 Results written to {path}")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,27 @@
 import subprocess
+import threading
+import signal
 import time
 import os
 import re
 
+# The CLI is looked up on PATH, so a stand-in script can take its place in tests
+CLAUDE_BIN = os.environ.get("ZEUS_CLAUDE_BIN", "claude")
+CLAUDE_TIMEOUT = float(os.environ.get("ZEUS_CLAUDE_TIMEOUT", 600))
+CLAUDE_PERMISSION_MODE = os.environ.get("ZEUS_CLAUDE_PERMISSION_MODE", "acceptEdits")
+# Coding jobs don't touch the screen, so the bot's claude lane runs several at once
+CLAUDE_WORKERS = int(os.environ.get("ZEUS_CLAUDE_WORKERS", 2))
+# How often a running command checks its cancel event
+CANCEL_POLL = 0.2
+
+# Coding-related keywords, compiled into one pattern instead of scanned one by one
+CODING_KEYWORDS = re.compile(r"\b(?:" + "|".join(re.escape(keyword) for keyword in [
+    'write', 'create', 'edit', 'modify', 'file', 'code', 'script', 'program',
+    'function', 'class', 'method', 'variable', 'python', 'javascript', 'html',
+    'css', 'read file', 'list files', 'directory', 'import', 'export', 'implement',
+    'debug', 'fix', 'error', 'compile', 'build', 'test', 'run'
+]) + r")\b", re.I)
+
 def is_coding_query(query):
     """
     Determine if a user query is related to coding tasks.
@@ -17,23 +36,11 @@ def is_coding_query(query):
     if query.lower().startswith('claude:'):
         return True
         
-    if 'claude' in query.lower() or 'code' in query.lower():
+    if 'claude' in query.lower():
         return True
         
-    # Check for coding-related keywords
-    coding_keywords = [
-        'write', 'create', 'edit', 'modify', 'file', 'code', 'script', 'program',
-        'function', 'class', 'method', 'variable', 'python', 'javascript', 'html',
-        'css', 'read file', 'list files', 'directory', 'import', 'export', 'implement',
-        'debug', 'fix', 'error', 'compile', 'build', 'test', 'run'
-    ]
-    
-    # Check if any of the coding keywords are in the query
-    for keyword in coding_keywords:
-        if keyword in query.lower():
-            return True
-            
-    return False
+    # Check for coding-related keywords, as whole words ("barcode" isn't "code")
+    return CODING_KEYWORDS.search(query) is not None
 
 def is_file_operation_prompt(prompt):
     """
@@ -63,132 +70,129 @@ def is_file_operation_prompt(prompt):
             
     return False
 
-def run_claude_command(prompt, handle_permissions=True, directory=None, debug=False):
+class ClaudeRun:
+    """Outcome of one headless claude invocation."""
+    def __init__(self, prompt, directory=None):
+        self.prompt = prompt
+        self.directory = directory
+        self.returncode = None
+        self.stdout = ""
+        self.stderr = ""
+        self.error = None
+        self.timed_out = False
+        self.cancelled = False
+        self.seconds = 0.0
+
+    @property
+    def ok(self):
+        return self.returncode == 0 and not (self.timed_out or self.cancelled) and self.error is None
+
+    @property
+    def summary(self):
+        if self.error:
+            return f"Error running Claude command: {self.error}"
+        if self.timed_out:
+            return f"Claude command timed out after {self.seconds:.0f}s"
+        if self.cancelled:
+            return f"Claude command cancelled after {self.seconds:.0f}s"
+        if self.returncode != 0:
+            return f"Claude command failed (exit {self.returncode}): {self.stderr.strip() or self.stdout.strip()}"
+        return self.stdout.strip() or "Claude command finished with no output"
+
+def claude_args(prompt, is_file_op, handle_permissions=True):
+    """Command line for a non-interactive run of the claude CLI."""
+    args = [CLAUDE_BIN, "-p", prompt]
+    if is_file_op and handle_permissions:
+        # Print mode can't answer permission prompts; let edits through up front instead
+        # of typing "y" into a terminal on a timer
+        args += ["--permission-mode", CLAUDE_PERMISSION_MODE]
+    return args
+
+def _pump(pipe, name, chunks, on_output):
+    for line in iter(pipe.readline, ""):
+        chunks.append(line)
+        if on_output:
+            on_output(name, line.rstrip("\n"))
+    pipe.close()
+
+def run_claude_command(prompt, handle_permissions=True, directory=None, debug=False, on_output=None, timeout=None, cancel=None):
     """
-    Executes a Claude command following strict rules:
-    1. For file operations: Handle initial trust and one file permission prompt with increased wait times
-    2. For other queries: Use the -p flag with NO permission handling
-    
+    Runs the claude CLI headlessly (claude -p) and waits for it to exit.
+
     Args:
         prompt: The prompt to send to Claude
-        handle_permissions: Whether to automatically handle permission prompts
-        directory: Optional directory to navigate to before running Claude
-        debug: Whether to print debug information
-    
+        handle_permissions: Whether file operations may edit without asking
+        directory: Optional directory to run Claude in
+        debug: Whether to echo Claude's output as it arrives
+        on_output: Optional callback(stream, line), called for each line of stdout/stderr
+        timeout: Seconds before the process is killed (default CLAUDE_TIMEOUT)
+        cancel: Optional threading.Event; once set, the process is killed
+
     Returns:
-        str: Status message
+        ClaudeRun: exit code, captured output and timing
     """
-    # Determine if this prompt likely involves file operations
     is_file_op = is_file_operation_prompt(prompt)
-    
-    # Escape special characters in the prompt for AppleScript
-    escaped_prompt = prompt.replace('"', '\\"').replace("'", "\\'").replace("\\", "\\\\")
-    
-    applescript = f'''
-    tell application "Terminal"
-        activate
-        set newTab to do script ""
-        -- Wait for Terminal to fully load
-        delay 2
-    '''
-    
-    # Add directory navigation if specified
-    if directory:
-        # Escape the directory path for AppleScript
-        escaped_directory = directory.replace('"', '\\"').replace("'", "\\'").replace("\\", "\\\\")
-        applescript += f'''
-        -- Change to the specified directory
-        do script "cd {escaped_directory}" in newTab
-        delay 1
-        '''
-    
-    # Choose between interactive mode and one-shot mode based on the prompt type
-    if is_file_op:
-        # INTERACTIVE MODE with strict permission handling for file operations
-        applescript += '''
-        -- Run Claude in interactive mode
-        do script "claude" in newTab
-        -- Wait for Claude to fully load
-        delay 3
-        
-        -- Handle initial trust permission (first pop-up)
-        delay 2
-        do script "y" in newTab
-        delay 0.5
-        do script "" in newTab  -- Press return
-        delay 2
-        
-        -- Press Enter to acknowledge any initial Claude message
-        do script "" in newTab  -- Press Enter
-        delay 2
-        '''
-        
-        # Type the actual prompt
-        applescript += f'''
-        -- Type the prompt
-        do script "{escaped_prompt}" in newTab
-        delay 1
-        do script "" in newTab  -- Press return
-        
-        -- Increased wait time before handling file permission pop-up
-        delay 8
-        
-        -- Handle file permission pop-up (second pop-up)
-        do script "y" in newTab
-        delay 0.5
-        do script "" in newTab  -- Press return
-        
-        -- No more interaction after this point
-        '''
-    else:
-        # ONE-SHOT MODE for regular queries - NO permission handling
-        applescript += f'''
-        -- Run Claude with -p flag for one-shot execution with no permission handling
-        do script "claude -p \\"{escaped_prompt}\\"" in newTab
-        
-        -- No permission handling for one-shot mode
-        '''
-    
-    applescript += '''
-    end tell
-    '''
-    
-    # Create temporary file for the AppleScript
-    script_path = "/tmp/run_claude.scpt"
-    with open(script_path, "w") as f:
-        f.write(applescript)
-    
-    # Execute the AppleScript
-    try:
-        if debug:
-            mode = "interactive mode (file operations)" if is_file_op else "one-shot mode (-p flag without permission handling)"
-            location = f" in directory: {directory}" if directory else ""
-            print(f"Executing Claude in {mode}{location}")
-        
-        result = subprocess.run(["osascript", script_path], capture_output=True, text=True)
-        
+    run = ClaudeRun(prompt, directory)
+    cwd = os.path.expanduser(directory) if directory else None
+    if cwd and not os.path.isdir(cwd):
+        run.error = f"no such directory: {directory}"
+        return run
+
+    if debug:
+        mode = "file operations" if is_file_op else "query"
+        location = f" in directory: {directory}" if directory else ""
+        print(f"Executing Claude headlessly ({mode}){location}")
+
+    def echo(stream, line):
         if debug:
-            print(f"AppleScript Output: {result.stdout}")
-            if result.stderr:
-                print(f"AppleScript Error: {result.stderr}")
-        
-        # Clean up the temporary file
-        os.remove(script_path)
-        
-        if result.returncode != 0:
-            return f"Error running Claude command: {result.stderr}"
-        
-        return "Claude command executed successfully"
-    except Exception as e:
-        return f"Error running Claude command: {str(e)}"
+            print(f"[claude{' stderr' if stream == 'stderr' else ''}] {line}")
+        if on_output:
+            on_output(stream, line)
 
-def handle_coding_task(query, debug=False):
+    started = time.perf_counter()
+    try:
+        process = subprocess.Popen(claude_args(prompt, is_file_op, handle_permissions), cwd=cwd, stdin=subprocess.DEVNULL,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, encoding="utf-8", errors="replace", bufsize=1,
+                                   start_new_session=True) # own process group, so a timeout also stops its tools
+    except OSError as e:
+        run.error = f"could not start {CLAUDE_BIN}: {e}"
+        return run
+
+    stdout, stderr = [], []
+    readers = [threading.Thread(target=_pump, args=(process.stdout, "stdout", stdout, echo), daemon=True),
+               threading.Thread(target=_pump, args=(process.stderr, "stderr", stderr, echo), daemon=True)]
+    for reader in readers:
+        reader.start()
+    deadline = started + (timeout or CLAUDE_TIMEOUT)
+    while run.returncode is None:
+        remaining = max(0.0, deadline - time.perf_counter())
+        try:
+            run.returncode = process.wait(timeout=remaining if cancel is None else min(remaining, CANCEL_POLL))
+        except subprocess.TimeoutExpired:
+            run.timed_out = time.perf_counter() >= deadline
+            run.cancelled = cancel is not None and cancel.is_set()
+            if not (run.timed_out or run.cancelled):
+                continue
+            try:
+                os.killpg(process.pid, signal.SIGKILL) # the whole group, so its tools stop too
+            except ProcessLookupError:
+                pass
+            run.returncode = process.wait()
+    for reader in readers:
+        reader.join()
+    run.stdout, run.stderr = "".join(stdout), "".join(stderr)
+    run.seconds = time.perf_counter() - started
+    return run
+
+def handle_coding_task(query, debug=False, on_output=None, cancel=None):
     """
     Main function to handle coding-related tasks using Claude Code.
     
     Args:
         query (str): The user's input query
         debug (bool): Whether to print debug information
+        on_output (callable): Optional callback(stream, line) for Claude's output as it streams
+        cancel (threading.Event): Optional; setting it kills the running Claude process
         
     Returns:
         tuple: (is_complete, summary, actions_log) similar to the run function
@@ -211,15 +215,18 @@ def handle_coding_task(query, debug=False):
         # Extract directory and the actual prompt
         directory = directory_match.group(1).strip()
         prompt = directory_match.group(2).strip()
-        result = run_claude_command(prompt, directory=directory, debug=debug)
         print(f"Running Claude in directory: {directory}")
         actions_log.append(f"✅ Executing in directory: {directory}")
     else:
         # No directory specified, run normally
+        directory = None
         prompt = claude_input
-        result = run_claude_command(prompt, debug=debug)
-    
+
     actions_log.append(f"✅ Using Claude Code for task: {prompt}")
-    actions_log.append(f"✅ {result}")
+    run = run_claude_command(prompt, directory=directory, debug=debug, on_output=on_output, cancel=cancel)
+    if run.ok:
+        actions_log.append(f"✅ Claude finished in {run.seconds:.1f}s")
+    else:
+        actions_log.append(f"❌ {run.summary}")
     
-    return True, result, "\n".join(actions_log) 
\ No newline at end of file
+    return run.ok, run.summary, "\n".join(actions_log)
@@ -7,8 +7,11 @@ from discord.ext import commands
 from discord.ui import View, Button
 from dotenv import load_dotenv
 import agent
-import utils.speech as speech
+import claude_code
+from utils.jobs import JobScheduler, HIGH, NORMAL, LOW
+from utils.progress import CoalescingUpdater
 import asyncio
+import importlib
 import json
 import random
 import string
@@ -19,6 +22,13 @@ load_dotenv()
 
 TOKEN = os.getenv("DISCORD_TOKEN")
 CHANNEL_ID = 1345727973550067802
+JOB_TIMEOUT = float(os.getenv("ZEUS_JOB_TIMEOUT", 600))  # seconds before a running job is stopped
+
+# Agent runs block for up to minutes, so they never run on the event loop. UI jobs
+# share one screen and run one at a time; "claude:" jobs don't touch the screen and
+# get their own lane.
+ui_jobs = JobScheduler("ui")
+claude_jobs = JobScheduler("claude", workers=claude_code.CLAUDE_WORKERS)
 
 class LocalUserAuth:
     def __init__(self, config_file="local_auth.json"):
@@ -67,6 +77,85 @@ class LocalUserAuth:
         """Check if a user is authorized"""
         return str(user_id) == self.authorized_id
 
+def run_command(command, cancel=None, on_progress=None):
+    """Runs one command on a scheduler thread; returns the summary to post back."""
+    if command.lower().startswith('claude'):
+        # Use execute_command for Claude-specific functionality; its output streams into the status message
+        output = []
+        def on_output(stream, line):
+            output.append(line)
+            if on_progress:
+                on_progress({"output": output[-10:]})
+        is_complete, summary, actions_log = agent.execute_command(command, use_narrator=False, use_maya=False, on_output=on_output, cancel=cancel)
+    else:
+        # Use the original run function for all other commands
+        is_complete, summary, actions_log = agent.run(command, debug=False, speak=False, cancel=cancel, on_progress=on_progress)
+    return summary
+
+def format_wait(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}m{seconds:02d}s" if minutes else f"{seconds}s"
+
+def queued_message(scheduler, job):
+    position, depth = scheduler.position(job), len(scheduler.pending())
+    if position <= 1:
+        return f"🗂️ Job #{job.id} starting now"
+    return f"🗂️ Job #{job.id} queued: position {position}, {depth} waiting, ~{format_wait(scheduler.estimated_wait(job))} until it starts"
+
+def progress_message(job, event):
+    """The live status for a running job, from one agent.run progress event or Claude's latest output."""
+    if "output" in event:
+        tail = "\n".join(line[:200] for line in event["output"]).replace("`", "'")
+        return f"⚙️ Job #{job.id}: Claude is working\n```\n{tail}\n```"
+    lines = [f"⚙️ Job #{job.id}: step {event['iteration']}/{event['max_iterations']}, {format_wait(event['timings']['elapsed'])} so far"]
+    evaluation = event["state"].get("evaluation_previous_goal", "")
+    if evaluation:
+        lines.append(f"📝 {evaluation[:300]}")
+    lines.extend(f"  {action[:200]}" for action in event["actions"][-5:])
+    if not event["complete"] and event["next_goal"]:
+        lines.append(f"🎯 Next: {event['next_goal'][:300]}")
+    return "\n".join(lines)
+
+def result_message(job):
+    if job.status == "done":
+        return f"✅ Job #{job.id} finished in {format_wait(job.duration)}:\n{str(job.result)[:1800]}"
+    if job.status == "failed":
+        return f"❌ Job #{job.id} failed: {job.error}"
+    if job.status == "timed_out":
+        return f"⏱️ Job #{job.id} stopped after the {format_wait(job.timeout)} limit"
+    return f"🛑 Job #{job.id} cancelled"
+
+async def submit_command(command, send, priority=NORMAL):
+    """Queues command and returns at once; send posts the queue status now and the result later."""
+    scheduler = claude_jobs if command.lower().startswith('claude:') else ui_jobs
+    # Progress from every iteration edits the queue status message in place; the
+    # updater coalesces fast iterations to stay within Discord's edit rate limit
+    status = asyncio.get_running_loop().create_future()
+
+    async def edit_status(event):
+        message = await status
+        if message is not None:
+            await message.edit(content=progress_message(job, event))
+    progress = CoalescingUpdater(edit_status).start()
+
+    job = scheduler.submit(run_command, command, name=command, priority=priority, timeout=JOB_TIMEOUT, on_progress=progress.update)
+    try:
+        status.set_result(await send(queued_message(scheduler, job)))
+    except Exception:
+        # without a status message nobody would hear of the job, so don't run it
+        scheduler.cancel(job.id)
+        status.set_result(None)
+        await progress.flush()
+        raise
+
+    async def report():
+        await job.done
+        await progress.flush()
+        print(f"✅ Job #{job.id} {job.status}: {job.result or job.error or ''}")
+        await send(result_message(job))
+    asyncio.create_task(report())
+    return job
+
 intents = discord.Intents.default()
 intents.message_content = True
 bot = commands.Bot(command_prefix="!", intents=intents)
@@ -98,10 +187,8 @@ class AppView(View):
             await interaction.response.defer()
             logger.info(f"Processing button click for: {message}")
             
-            # Button clicks will always use normal run since they're predefined tasks
-            response = agent.run(message, debug=False, speak=False)
-            
-            await interaction.followup.send(response, ephemeral=False)
+            # Button clicks are demo prompts, so typed and spoken commands go first
+            await submit_command(message, lambda text: interaction.followup.send(text, ephemeral=False), priority=LOW)
         return callback
 
 @bot.event
@@ -144,7 +231,9 @@ async def on_ready():
     else:
         print("❌ ERROR: Could not find the channel.")
     
-    bot.loop.create_task(listen_for_commands())
+    # ZEUS_VOICE=0 runs text-only, without loading the microphone and Whisper
+    if os.getenv("ZEUS_VOICE", "1") != "0":
+        bot.loop.create_task(listen_for_commands())
 
 @bot.command(name="auth")
 async def auth_command(ctx, code: str = None):
@@ -159,36 +248,57 @@ async def auth_command(ctx, code: str = None):
         # Don't tell unauthorized users that they're unauthorized
         await ctx.send("❌ Invalid authentication code.")
 
+@bot.command(name="jobs")
+async def jobs_command(ctx):
+    if not auth.is_authorized(str(ctx.author.id)):
+        await ctx.send("❌ You are not authorized to control this bot.")
+        return
+    lines = []
+    for scheduler in (ui_jobs, claude_jobs):
+        for job in scheduler.running.values():
+            lines.append(f"▶️ #{job.id} [{scheduler.name}] running for {format_wait(job.duration)}: {job.name}")
+        for job in scheduler.pending():
+            lines.append(f"⏳ #{job.id} [{scheduler.name}] position {scheduler.position(job)}, ~{format_wait(scheduler.estimated_wait(job))}: {job.name}")
+    await ctx.send("\n".join(lines) if lines else "No jobs queued or running.")
+
+@bot.command(name="cancel")
+async def cancel_command(ctx, job_id: int = None):
+    if not auth.is_authorized(str(ctx.author.id)):
+        await ctx.send("❌ You are not authorized to control this bot.")
+        return
+    if job_id is None:
+        await ctx.send("Please provide a job id: !cancel [id]")
+        return
+    if ui_jobs.cancel(job_id) or claude_jobs.cancel(job_id):
+        await ctx.send(f"🛑 Cancelling job #{job_id}")
+    else:
+        await ctx.send(f"❌ No queued or running job #{job_id}")
+
 async def listen_for_commands():
     """Continuously listens for speech and processes commands in parallel."""
+    # Imported here so the bot starts without torch/Whisper; the import is slow, so keep it off the event loop
+    listener = await asyncio.to_thread(importlib.import_module, "utils.listener")
+    # One long-lived stream and resident models; commands spoken while a task runs wait in the queue
+    commands = listener.ListenerService().start()
     while True:
 
-        command = await asyncio.to_thread(speech.get_speech_command)  # Run speech recognition in a separate thread
+        command = await commands.get()
 
         if command:
             # Clean up the command by removing leading commas and spaces
             command = command.lstrip(', ')
             
-            print(f"✅ Running command: {command}")
-            
-            # Check if command starts with 'claude' (case insensitive)
-            if command.lower().startswith('claude'):
-                # Use execute_command for Claude-specific functionality
-                is_complete, summary, actions_log = await asyncio.to_thread(agent.execute_command, command, False, False)
-                response = summary
-            else:
-                # Use the original run function for all other commands
-                response = await asyncio.to_thread(agent.run, command, False, False)
-                
-            print(f"✅ Task completed: {response}")
+            print(f"✅ Queueing command: {command}")
             
-            # Send the response to Discord channel
+            # Send status and results to the Discord channel
             channel = bot.get_channel(CHANNEL_ID)
-            if channel:
-                await channel.send(f"Voice command: '{command}'\n\nResults:\n{response}")
-            
-        else:
-            print("🔇 Restarting listener...")
+
+            async def send(text, command=command):
+                if channel:
+                    return await channel.send(f"Voice command: '{command}'\n{text}")
+
+            # Someone is at the machine, so spoken commands go first
+            await submit_command(command, send, priority=HIGH)
 
 @bot.event
 async def on_message(message: discord.Message):
@@ -211,16 +321,7 @@ async def on_message(message: discord.Message):
     
     logger.info(f"Processing message from {message.author}: {message.content}")
     
-    # Check if message starts with 'claude' (case insensitive)
-    if message.content.lower().startswith('claude'):
-        # Use execute_command for Claude-specific functionality
-        is_complete, summary, actions_log = agent.execute_command(message.content, use_narrator=False, use_maya=False)
-        response = summary
-    else:
-        # Use the original run function for all other commands
-        response = agent.run(message.content, debug=False, speak=False)
-
-    # Send the response back to the channel
-    await message.reply(response)
+    # Replies with the job id right away and with the result when it finishes
+    await submit_command(message.content, message.reply)
 
 bot.run(TOKEN)
\ No newline at end of file
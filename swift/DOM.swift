@@ -45,8 +45,10 @@ public struct DOMElement {
     let isClickable: Bool
     let clickableId: Int?
     let parent: AXUIElement?
+    let parentId: Int?
     let uielem: AXUIElement
     let role: String
+    let frame: CGRect?
     var children: [Int]
     var depth: Int
 }
@@ -77,6 +79,7 @@ public func getCurrentDom() -> [Int: DOMElement] {
         
         // Check visibility
         var isVisible = true
+        var frame: CGRect? = nil
         var position: CFTypeRef?
         var size: CFTypeRef?
         if AXUIElementCopyAttributeValue(element, kAXPositionAttribute as CFString, &position) == .success,
@@ -87,6 +90,7 @@ public func getCurrentDom() -> [Int: DOMElement] {
                AXValueGetValue(size as! AXValue, AXValueType.cgSize, &elementSize) {
                 isVisible = !(point.x < appFrame.minX || point.y < appFrame.minY || point.x > appFrame.maxX || point.y > appFrame.maxY)
                 if !isVisible { return nil }
+                frame = CGRect(origin: point, size: elementSize)
             }
         }
         
@@ -119,8 +123,10 @@ public func getCurrentDom() -> [Int: DOMElement] {
             isClickable: isClickable,
             clickableId: clickableId,
             parent: parentElement,
+            parentId: parentId,
             uielem: element,
             role: role,
+            frame: frame,
             children: [],
             depth: depth
         )
@@ -211,35 +217,100 @@ public func getElementInfo(element: DOMElement) -> String {
     return elementInfo
 }
 
-public func domToString(some_dom: [Int: DOMElement]) -> String {
-    var context = ""
-    
-    // Get active app info
+// Cheap "has the screen changed" probe for settle detection: the front app and a hash
+// of the roles, titles and values of its first elements, plus the focused element's
+// value. Unlike getCurrentDom it skips osascript and element bookkeeping, so it can
+// be polled every few tens of ms.
+public func uiFingerprint(maxElements: Int = 300) -> String {
+    guard let app = workspace.frontmostApplication else { return "|0" }
+    let appRef = AXUIElementCreateApplication(app.processIdentifier)
+    var hasher = Hasher()
+    var count = 0
+    func visit(_ element: AXUIElement) {
+        if count >= maxElements { return }
+        count += 1
+        for attribute in [kAXRoleAttribute, kAXTitleAttribute, kAXValueAttribute] {
+            var value: AnyObject?
+            AXUIElementCopyAttributeValue(element, attribute as CFString, &value)
+            if let string = value as? String { hasher.combine(string) }
+        }
+        var children: AnyObject?
+        if AXUIElementCopyAttributeValue(element, kAXChildrenAttribute as CFString, &children) == .success,
+           let children = children as? [AXUIElement] {
+            for child in children { visit(child) }
+        }
+    }
+    visit(appRef)
+    hasher.combine(count)
+    // The focused element may lie past maxElements (a text field deep in a big
+    // window); its value is what a paste changes, so it is always part of the hash
+    var focused: AnyObject?
+    if AXUIElementCopyAttributeValue(appRef, kAXFocusedUIElementAttribute as CFString, &focused) == .success, let focused = focused {
+        var value: AnyObject?
+        AXUIElementCopyAttributeValue(focused as! AXUIElement, kAXValueAttribute as CFString, &value)
+        if let string = value as? String { hasher.combine(string) }
+    }
+    return "\(app.bundleIdentifier ?? "")|\(hasher.finalize())"
+}
+
+// Text attributes of an element, keyed the way the Python DOMSnapshot expects them
+public func elementAttributes(element: DOMElement) -> [String: String] {
+    var attributes: [String: String] = [:]
+    let names: [(String, String)] = [
+        ("title", kAXTitleAttribute),
+        ("description", kAXDescriptionAttribute),
+        ("value", kAXValueAttribute),
+        ("placeholder", kAXPlaceholderValueAttribute),
+        ("text", kAXTextAttribute)
+    ]
+    for (key, attribute) in names {
+        var attributeValue: AnyObject?
+        AXUIElementCopyAttributeValue(element.uielem, attribute as CFString, &attributeValue)
+        if let value = attributeValue as? String, !value.isEmpty {
+            attributes[key] = value
+        }
+    }
+    return attributes
+}
+
+// Serializes the DOM for utils/dom.py: the active app, every element with its parent
+// link and bounds (text attributes only for clickable and static text elements, to
+// keep the number of accessibility calls down) and the running apps.
+public func domToJSON(some_dom: [Int: DOMElement]) -> String {
     let frontAppInfo = getFrontApp()
-    let appName = frontAppInfo[1]
-    let bundleId = frontAppInfo[2]
-    context += "### Active app: \(appName) (\(bundleId))\n"
-    
-    context += "#### MacOS app elements:\n"
     
-    // Only collect clickable elements
-    let clickableElements = some_dom.values.filter { $0.isClickable }.sorted { $0.clickableId ?? 0 < $1.clickableId ?? 0 }
-    
-    for element in clickableElements {
-        let info = getElementInfo(element: element)
-        if !info.isEmpty {
-            context += info + "\n"
+    var elements: [[String: Any]] = []
+    for element in some_dom.values.sorted(by: { $0.id < $1.id }) {
+        var entry: [String: Any] = ["id": element.id, "role": element.role]
+        if let clickableId = element.clickableId { entry["clickable_id"] = clickableId }
+        if let parentId = element.parentId { entry["parent"] = parentId }
+        if let frame = element.frame {
+            entry["bounds"] = [Double(frame.origin.x), Double(frame.origin.y), Double(frame.width), Double(frame.height)]
+        }
+        if element.isClickable || element.role == "AXStaticText" {
+            for (key, value) in elementAttributes(element: element) { entry[key] = value }
         }
+        elements.append(entry)
     }
     
-    context += "\n\n### Active app bundleids:\n"
-    var uniqueBundleIds = Set<String>()    
+    var apps: [[String]] = []
+    var uniqueBundleIds = Set<String>()
     for app in workspace.runningApplications {
         if let bundleId = app.bundleIdentifier, !uniqueBundleIds.contains(bundleId) {
             uniqueBundleIds.insert(bundleId)
-            context += "\(app.localizedName ?? ""), \(bundleId)\n"
+            apps.append([app.localizedName ?? "", bundleId])
         }
     }
-
-    return context
-}
\ No newline at end of file
+    
+    let snapshot: [String: Any] = [
+        "app_name": frontAppInfo[1],
+        "bundle_id": frontAppInfo[2],
+        "elements": elements,
+        "apps": apps
+    ]
+    guard let data = try? JSONSerialization.data(withJSONObject: snapshot),
+          let json = String(data: data, encoding: .utf8) else {
+        return "{}"
+    }
+    return json
+}
@@ -16,12 +16,9 @@ private func openApplication(bundleId: String) throws {
     }
     
     workspace.openApplication(at: appURL, configuration: NSWorkspace.OpenConfiguration())
-    print("✅ opened application: \(bundleId)")
-    
-    // Wait for 0.5s if app was already running, 3s if newly opened
-    let waitTime = isAppAlreadyRunning ? 0.5 : 3.0
-    print("waiting for \(waitTime)s")
-    Thread.sleep(forTimeInterval: waitTime)
+    // No fixed sleep here: the Python side waits for the app to come to the front
+    // and for its UI to settle (utils/settle.py)
+    print("✅ opened application: \(bundleId)\(isAppAlreadyRunning ? "" : " (launching)")")
 }
 
 let appFrame = NSScreen.main?.frame ?? CGRect.zero
@@ -66,17 +63,77 @@ private func clickElement(clickableId: Int) throws {
     } else {
         throw NSError(domain: "Executor", code: 4, userInfo: [NSLocalizedDescriptionKey: "Failed to get position and size for element with info= \(elementInfo)"])
     }
-    Thread.sleep(forTimeInterval: 0.3)
+}
+
+private func axChildren(_ element: AXUIElement) -> [AXUIElement] {
+    var children: AnyObject?
+    guard AXUIElementCopyAttributeValue(element, kAXChildrenAttribute as CFString, &children) == .success else { return [] }
+    return children as? [AXUIElement] ?? []
+}
+private func axString(_ element: AXUIElement, _ attribute: String) -> String {
+    var value: AnyObject?
+    AXUIElementCopyAttributeValue(element, attribute as CFString, &value)
+    return value as? String ?? ""
+}
+// Menu titles compare without case or a trailing ellipsis: "Save As" finds "Save As…"
+private func menuTitle(_ title: String) -> String {
+    var title = title.trimmingCharacters(in: .whitespaces).lowercased()
+    for suffix in ["…", "..."] where title.hasSuffix(suffix) {
+        title = String(title.dropLast(suffix.count))
+    }
+    return title
+}
+
+// Presses a menu item by its titles from the menu bar down. getCurrentDom leaves the
+// menu bar out (it would swamp the prompt), so menus are walked here instead, through
+// the front app's kAXMenuBarAttribute; no menu has to be opened on screen first.
+private func selectMenuPath(titles path: [String]) throws {
+    guard let app = workspace.frontmostApplication, !path.isEmpty else {
+        throw NSError(domain: "Executor", code: 5, userInfo: [NSLocalizedDescriptionKey: "No front app or empty menu path"])
+    }
+    var menuBar: AnyObject?
+    guard AXUIElementCopyAttributeValue(AXUIElementCreateApplication(app.processIdentifier), kAXMenuBarAttribute as CFString, &menuBar) == .success else {
+        throw NSError(domain: "Executor", code: 5, userInfo: [NSLocalizedDescriptionKey: "\(app.localizedName ?? "front app") has no menu bar"])
+    }
+    var items = axChildren(menuBar as! AXUIElement)
+    for (depth, title) in path.enumerated() {
+        let trail = path[0...depth].joined(separator: " > ")
+        guard let item = items.first(where: { menuTitle(axString($0, kAXTitleAttribute)) == menuTitle(title) }) else {
+            throw NSError(domain: "Executor", code: 5, userInfo: [NSLocalizedDescriptionKey: "Menu item not found: \(trail)"])
+        }
+        if depth == path.count - 1 {
+            var enabled: AnyObject?
+            if AXUIElementCopyAttributeValue(item, kAXEnabledAttribute as CFString, &enabled) == .success, (enabled as? Bool) == false {
+                throw NSError(domain: "Executor", code: 5, userInfo: [NSLocalizedDescriptionKey: "Menu item is disabled: \(trail)"])
+            }
+            AXUIElementPerformAction(item, kAXPressAction as CFString)
+            print("✅ selected menu item \(trail)")
+            return
+        }
+        // a menu bar item or submenu item holds its menu as an AXMenu child
+        guard let menu = axChildren(item).first(where: { axString($0, kAXRoleAttribute) == kAXMenuRole }) else {
+            throw NSError(domain: "Executor", code: 5, userInfo: [NSLocalizedDescriptionKey: "Not a menu: \(trail)"])
+        }
+        items = axChildren(menu)
+    }
 }
 
 // MARK: - C Interface
-@_cdecl("get_dom_str") // refreshes DOM, returns it as a String
-public func get_dom_str() -> UnsafeMutablePointer<CChar> {
+@_cdecl("get_dom_json") // refreshes DOM, returns it as a JSON string the caller frees with free_dom_str
+public func get_dom_json() -> UnsafeMutablePointer<CChar> {
     dom = getCurrentDom()
-    let domString = domToString(some_dom: dom)
-    let cString = strdup(domString)
+    let domJSON = domToJSON(some_dom: dom)
+    let cString = strdup(domJSON)
     return cString!
 }
+@_cdecl("get_ui_fingerprint") // "bundle_id|digest" of the front app's tree, freed with free_dom_str; leaves the cached dom alone
+public func get_ui_fingerprint() -> UnsafeMutablePointer<CChar> {
+    return strdup(uiFingerprint())!
+}
+@_cdecl("free_dom_str")
+public func free_dom_str(_ pointer: UnsafeMutablePointer<CChar>) {
+    free(pointer)
+}
 // executor actions
 @_cdecl("openApp")
 public func openApp(bundleId: UnsafePointer<CChar>) -> Bool {
@@ -98,4 +155,14 @@ public func clickElement(elementId: Int32) -> Bool {
         print("❌ Error: \(error.localizedDescription)")
         return false
     }
-}
\ No newline at end of file
+}
+@_cdecl("selectMenuPath") // path is the menu titles joined with newlines
+public func selectMenuPath(path: UnsafePointer<CChar>) -> Bool {
+    do {
+        try selectMenuPath(titles: String(cString: path).components(separatedBy: "\n"))
+        return true
+    } catch {
+        print("❌ Error: \(error.localizedDescription)")
+        return false
+    }
+}
@@ -0,0 +1,208 @@
+import numpy as np
+import queue
+import wave
+import time
+
+RATE = 16000
+CHUNK = 1024
+
+class RingBuffer:
+    """
+    Fixed-size int16 sample store addressed by absolute sample position (samples
+    written since creation), so callers can hold on to positions while it wraps.
+    """
+    def __init__(self, capacity, dtype=np.int16):
+        self.data = np.zeros(capacity, dtype=dtype)
+        self.capacity = capacity
+        self.total = 0
+
+    @property
+    def start(self):
+        """Oldest absolute position still held."""
+        return max(0, self.total - self.capacity)
+
+    def extend(self, samples):
+        count = len(samples)
+        samples = samples[-self.capacity:] # only the tail of an oversized write survives anyway
+        offset = (self.total + count - len(samples)) % self.capacity
+        first = min(len(samples), self.capacity - offset)
+        self.data[offset:offset + first] = samples[:first]
+        self.data[:len(samples) - first] = samples[first:]
+        self.total += count
+
+    def get(self, start, end=None):
+        """Samples in [start, end), clipped to what is still held."""
+        end = self.total if end is None else min(end, self.total)
+        start = max(start, self.start)
+        if start >= end:
+            return np.zeros(0, dtype=self.data.dtype)
+        first, length = start % self.capacity, end - start
+        if first + length <= self.capacity:
+            return self.data[first:first + length].copy()
+        return np.concatenate((self.data[first:], self.data[:first + length - self.capacity]))
+
+def frame_energy(samples, frame):
+    """RMS of each whole frame of int16 samples."""
+    count = len(samples) // frame
+    frames = samples[:count * frame].reshape(count, frame).astype(np.float32)
+    return np.sqrt((frames * frames).mean(axis=1))
+
+class VAD:
+    """
+    Energy voice activity detector working on fixed frames. Speech starts after
+    onset_ms of consecutive voiced frames and ends after hangover_ms of consecutive
+    unvoiced ones, so clicks don't open an utterance and short pauses don't close
+    it. A frame is voiced when its RMS is over both threshold and noise_ratio times
+    the noise floor, which tracks the room while nobody is speaking.
+    """
+    def __init__(self, rate=RATE, frame_ms=30, threshold=300, onset_ms=90, hangover_ms=2000, noise_ratio=3.0):
+        self.frame = rate * frame_ms // 1000
+        self.frame_ms = frame_ms
+        self.threshold = threshold
+        self.noise_ratio = noise_ratio
+        self.onset_frames = max(1, onset_ms // frame_ms)
+        self.set_hangover(hangover_ms)
+        self.reset()
+
+    def set_hangover(self, hangover_ms):
+        self.hangover_frames = max(1, int(hangover_ms) // self.frame_ms)
+
+    def reset(self, position=0):
+        self.position = position # absolute sample position of the next unprocessed sample
+        self.pending = np.zeros(0, dtype=np.int16)
+        self.speaking = False
+        self.voiced_run = 0
+        self.silent_run = 0
+        self.noise_floor = None
+
+    def process(self, samples):
+        """Feeds samples, returns [("start" | "end", absolute position), ...]."""
+        if len(self.pending):
+            samples = np.concatenate((self.pending, samples))
+        energies = frame_energy(samples, self.frame)
+        used = len(energies) * self.frame
+        self.pending = samples[used:].copy()
+        events = []
+        threshold = self.threshold
+        for index, energy in enumerate(energies):
+            frame_start = self.position + index * self.frame
+            if not self.speaking:
+                self.noise_floor = energy if self.noise_floor is None else 0.95 * self.noise_floor + 0.05 * energy
+                threshold = max(self.threshold, self.noise_ratio * self.noise_floor)
+            voiced = energy > threshold
+            if self.speaking:
+                self.silent_run = 0 if voiced else self.silent_run + 1
+                if self.silent_run >= self.hangover_frames:
+                    self.speaking = False
+                    self.voiced_run = 0
+                    events.append(("end", frame_start + self.frame - self.silent_run * self.frame))
+            else:
+                self.voiced_run = self.voiced_run + 1 if voiced else 0
+                if self.voiced_run >= self.onset_frames:
+                    self.speaking = True
+                    self.silent_run = 0
+                    events.append(("start", frame_start + self.frame - self.voiced_run * self.frame))
+        self.position += used
+        return events
+
+class Capture:
+    """
+    One PyAudio input stream. The callback only copies each chunk into a bounded
+    queue (dropping the oldest when the consumer falls behind); read() blocks on
+    that queue, so listening costs no CPU while the room is quiet.
+    """
+    def __init__(self, rate=RATE, chunk=CHUNK, max_chunks=256):
+        self.rate = rate
+        self.chunk = chunk
+        self.chunks = queue.Queue(maxsize=max_chunks)
+        self.dropped = 0
+        self.pyaudio = None
+        self.stream = None
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        import pyaudio
+        samples = np.frombuffer(in_data, dtype=np.int16).copy()
+        try:
+            self.chunks.put_nowait(samples)
+        except queue.Full:
+            try:
+                self.chunks.get_nowait()
+            except queue.Empty:
+                pass
+            self.dropped += 1
+            self.chunks.put_nowait(samples)
+        return (None, pyaudio.paContinue)
+
+    def start(self):
+        import pyaudio
+        if self.stream is None:
+            self.pyaudio = pyaudio.PyAudio()
+            self.stream = self.pyaudio.open(format=pyaudio.paInt16, channels=1, rate=self.rate, input=True,
+                                            frames_per_buffer=self.chunk, stream_callback=self._callback)
+        self.stream.start_stream()
+        return self
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.pyaudio.terminate()
+            self.stream = self.pyaudio = None
+
+    def read(self, timeout=None):
+        """Next chunk of int16 samples, or None when nothing arrived within timeout."""
+        try:
+            return self.chunks.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+class ArraySource:
+    """
+    Replays recorded samples through the same read() interface as Capture, for
+    benchmarks and fixtures. realtime=True paces chunks like a live microphone.
+    """
+    def __init__(self, samples, rate=RATE, chunk=CHUNK, realtime=False):
+        self.samples = samples
+        self.rate = rate
+        self.chunk = chunk
+        self.realtime = realtime
+        self.offset = 0
+        self.started = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        return self
+
+    def stop(self):
+        pass
+
+    @property
+    def exhausted(self):
+        return self.offset >= len(self.samples)
+
+    def read(self, timeout=None):
+        if self.exhausted:
+            return None
+        if self.realtime:
+            due = self.started + (self.offset + self.chunk) / self.rate
+            time.sleep(max(0.0, due - time.perf_counter()))
+        chunk = self.samples[self.offset:self.offset + self.chunk]
+        self.offset += self.chunk
+        return chunk
+
+def read_wav(path, rate=RATE):
+    """16-bit mono WAV as int16 samples; other rates are resampled linearly."""
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit samples")
+        samples = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+        if f.getnchannels() > 1:
+            samples = samples.reshape(-1, f.getnchannels()).mean(axis=1).astype(np.int16)
+        if f.getframerate() != rate:
+            positions = np.arange(0, len(samples), f.getframerate() / rate)
+            samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.int16)
+    return samples
+
+def to_float(samples):
+    """int16 samples as the float32 [-1, 1] array Whisper expects."""
+    return samples.astype(np.float32) / 32768.0
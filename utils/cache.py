@@ -0,0 +1,78 @@
+from collections import OrderedDict
+import threading
+import json
+import os
+
+def cache_dir():
+    """Per-user cache directory (ZEUS_CACHE_DIR, else $XDG_CACHE_HOME/zeus-agent)."""
+    path = os.environ.get("ZEUS_CACHE_DIR") or os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "zeus-agent")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+class DiskLRU:
+    """
+    Small JSON-backed LRU store. Entries are kept most-recently-used last and the
+    file is rewritten atomically on every change, so it is safe to kill the agent
+    at any point. Hit/miss counters are persisted alongside the entries.
+    """
+    def __init__(self, filename, max_entries=256):
+        self.path = os.path.join(cache_dir(), filename)
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            self.entries = OrderedDict(data.get("entries", []))
+            self.stats.update(data.get("stats", {}))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error loading cache {self.path}: {e}")
+
+    def _save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"entries": list(self.entries.items()), "stats": self.stats}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving cache {self.path}: {e}")
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def record(self, hit):
+        with self.lock:
+            self.stats["hits" if hit else "misses"] += 1
+            self._save()
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self._save()
+
+    def remove(self, key):
+        with self.lock:
+            removed = self.entries.pop(key, None) is not None
+            if removed:
+                self._save()
+            return removed
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.stats = {"hits": 0, "misses": 0}
+            self._save()
@@ -0,0 +1,161 @@
+from utils.element_index import ElementIndex, ScreenIds, describe, relocate
+
+class Outcome:
+    """
+    Per-sub-step record of one compound action. Each step is a dict
+    {"step", "ok", "detail"}; ok is True, False, or None when the step ran but
+    the screen couldn't confirm it (a field that doesn't expose its value).
+    """
+    def __init__(self, name):
+        self.name = name
+        self.steps = []
+
+    def add(self, step, ok, detail=""):
+        self.steps.append({"step": step, "ok": ok, "detail": detail})
+        return ok is not False
+
+    @property
+    def ok(self):
+        return bool(self.steps) and all(step["ok"] is not False for step in self.steps)
+
+    def describe(self):
+        marks = {True: "✓", False: "✗", None: "?"}
+        steps = "; ".join(f"{marks[step['ok']]} {step['step']}" + (f" ({step['detail']})" if step["detail"] else "") for step in self.steps)
+        return f"{self.name}: {steps or 'nothing to do'}"
+
+def signature(snapshot):
+    """What the screen shows, to tell whether a submit did anything."""
+    return (snapshot.bundle_id, tuple((element.role, element.label) for element in snapshot.clickable()))
+
+class Compound:
+    """
+    Runs a compound action as a sequence of executor calls. Every sub-step is
+    resolved against, and then checked on, a fresh snapshot, so a batch stops at
+    the first step the screen contradicts instead of running blind. ids are the
+    batch's ScreenIds: an {"id"} the model gave still means the element it saw
+    after the steps before it have renumbered the screen.
+    """
+    def __init__(self, executor, ids=None):
+        self.executor = executor
+        self.ids = ids or ScreenIds(executor)
+
+    def snapshot(self):
+        return self.ids.current()
+
+    def changed(self):
+        self.ids.changed()
+
+    def element(self, model_id):
+        self.snapshot() # checked against the screen as it is now, not as the model saw it
+        return self.ids.element(model_id)
+
+    def field(self, spec):
+        if "id" in spec:
+            return self.element(spec["id"])
+        found = ElementIndex(self.snapshot()).find_labeled(spec.get("label", ""))
+        return found.element, (None if found else found.message())
+
+    def type(self, outcome, element, text):
+        step = f"typed {text!r} into {describe(element)}"
+        if not self.executor.type_in_element(element.clickable_id, text):
+            return outcome.add(step, False, "type failed")
+        self.changed()
+        after = relocate(element, self.snapshot())
+        if after is None:
+            return outcome.add(step, None, "field moved, not verified")
+        if not after.value:
+            return outcome.add(step, None, "field has no readable value")
+        if text not in after.value:
+            return outcome.add(step, False, f"field shows {after.value[:40]!r}")
+        return outcome.add(step, True)
+
+    def click(self, outcome, element, step=None):
+        step = step or f"clicked {describe(element)}"
+        ok = self.executor.click_element(element.clickable_id)
+        self.changed()
+        return outcome.add(step, True if ok else False, "" if ok else "click failed")
+
+    def fill_and_submit(self, params):
+        """fields: [{"label" or "id", "text"}]; submit: "enter" (default), {"text"}, {"id"}, {"keys"} or null; expect: text to see after."""
+        outcome = Outcome("fill_and_submit")
+        for spec in params.get("fields", []):
+            element, error = self.field(spec)
+            if element is None:
+                outcome.add(f"find field {spec.get('label', spec.get('id'))!r}", False, error)
+                return outcome
+            if not self.type(outcome, element, str(spec.get("text", ""))):
+                return outcome
+
+        submit = params.get("submit", "enter")
+        if not submit:
+            return outcome
+        if isinstance(submit, str):
+            submit = {"keys": submit.split("+")}
+        before = signature(self.snapshot())
+        if "keys" in submit:
+            keys = submit["keys"]
+            ok = self.executor.hotkey(keys)
+            self.changed()
+            if not outcome.add(f"pressed {'+'.join(keys)}", True if ok else False, "" if ok else "hotkey failed"):
+                return outcome
+        else:
+            if "id" in submit:
+                element, error = self.element(submit["id"])
+            else:
+                found = ElementIndex(self.snapshot()).find(submit.get("text", ""), submit.get("role"))
+                element, error = found.element, (None if found else found.message())
+            if element is None:
+                outcome.add("find submit button", False, error)
+                return outcome
+            if not self.click(outcome, element):
+                return outcome
+
+        after = self.snapshot()
+        expect = params.get("expect")
+        if expect:
+            seen = any(expect.lower() in element.label.lower() for element in after.elements)
+            outcome.add(f"see {expect!r}", seen, "" if seen else "not on screen after submit")
+        elif signature(after) == before:
+            outcome.add("screen changed", None, "nothing changed after submit")
+        return outcome
+
+    def select_menu_path(self, params):
+        """path: menu titles from the menu bar down, e.g. ["File", "New Folder"]. Menus aren't in the snapshot, so the executor walks the menu bar itself."""
+        outcome = Outcome("select_menu_path")
+        path = [str(title) for title in params.get("path", [])]
+        if not path:
+            outcome.add("choose a menu item", False, "no path given")
+            return outcome
+        ok = self.executor.select_menu_path(path)
+        self.changed()
+        outcome.add(f"chose {' > '.join(path)!r}", True if ok else False, "" if ok else "no such menu item, or it is disabled")
+        return outcome
+
+    def repeat(self, params):
+        """action: "click_element" or "type_in_element" (with text); ids: the elements to apply it to, in order."""
+        outcome = Outcome("repeat")
+        action = params.get("action", "click_element")
+        template = action if isinstance(action, dict) else {action: {}}
+        name = next(iter(template), "click_element")
+        if name not in ("click_element", "type_in_element"):
+            outcome.add(f"repeat {name}", False, "only click_element and type_in_element can be repeated")
+            return outcome
+        options = template[name] if isinstance(template[name], dict) else {}
+        text = str(options.get("text", params.get("text", "")))
+        for element_id in params.get("ids", []):
+            element, error = self.element(element_id)
+            if element is None:
+                outcome.add(f"find element {element_id}", False, error)
+                if not params.get("continue_on_failure"):
+                    return outcome
+                continue
+            ok = self.click(outcome, element) if name == "click_element" else self.type(outcome, element, text)
+            if not ok and not params.get("continue_on_failure"):
+                return outcome
+        return outcome
+
+ACTIONS = ("fill_and_submit", "select_menu_path", "repeat")
+
+def run(executor, name, params, ids=None):
+    """Runs compound action name with its params; ids maps the model's element ids (a ScreenIds)."""
+    return getattr(Compound(executor, ids), name)(params if isinstance(params, dict) else {})
@@ -0,0 +1,100 @@
+import json
+
+class Element:
+    __slots__ = ("id", "clickable_id", "role", "title", "description", "value", "placeholder", "text", "bounds", "parent")
+
+    def __init__(self, id, role, clickable_id=None, title="", description="", value="", placeholder="", text="", bounds=None, parent=None):
+        self.id = id
+        self.clickable_id = clickable_id
+        self.role = role
+        self.title = title
+        self.description = description
+        self.value = value
+        self.placeholder = placeholder
+        self.text = text
+        self.bounds = bounds # (x, y, width, height) in screen points
+        self.parent = parent # id of the parent element
+
+    @property
+    def label(self):
+        label = " ".join(part for part in (self.title, self.description, self.value, self.text) if part)
+        if self.placeholder:
+            label += f" placeholder={self.placeholder}"
+        return label.strip()
+
+    def __repr__(self):
+        return f"Element({self.clickable_id or self.id}, {self.role}, {self.label!r})"
+
+class DOMSnapshot:
+    """The front app's accessibility tree as returned by get_dom_json, plus the running apps."""
+    __slots__ = ("app_name", "bundle_id", "elements", "apps", "_by_id", "_by_clickable_id")
+
+    def __init__(self, app_name, bundle_id, elements=(), apps=()):
+        self.app_name = app_name
+        self.bundle_id = bundle_id
+        self.elements = list(elements)
+        self.apps = [tuple(app) for app in apps] # (name, bundle_id)
+        self._by_id = {element.id: element for element in self.elements}
+        self._by_clickable_id = {element.clickable_id: element for element in self.elements if element.clickable_id is not None}
+
+    @classmethod
+    def from_dict(cls, data):
+        elements = [Element(
+            id=entry["id"],
+            role=entry.get("role", ""),
+            clickable_id=entry.get("clickable_id"),
+            title=entry.get("title", ""),
+            description=entry.get("description", ""),
+            value=entry.get("value", ""),
+            placeholder=entry.get("placeholder", ""),
+            text=entry.get("text", ""),
+            bounds=tuple(entry["bounds"]) if entry.get("bounds") else None,
+            parent=entry.get("parent"),
+        ) for entry in data.get("elements", [])]
+        return cls(data.get("app_name", "Unknown"), data.get("bundle_id", ""), elements, data.get("apps", []))
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text) if text else {})
+
+    def to_dict(self):
+        elements = []
+        for element in self.elements:
+            entry = {slot: getattr(element, slot) for slot in Element.__slots__ if getattr(element, slot) not in (None, "")}
+            elements.append(entry)
+        return {"app_name": self.app_name, "bundle_id": self.bundle_id, "elements": elements, "apps": [list(app) for app in self.apps]}
+
+    def element(self, clickable_id):
+        return self._by_clickable_id.get(clickable_id)
+
+    def parent_of(self, element):
+        return self._by_id.get(element.parent)
+
+    def clickable(self):
+        """Clickable elements worth showing the model, in clickable-id order."""
+        elements = [element for element in self._by_clickable_id.values()
+                    if not (element.role == "AXGroup" and not element.label)] # empty groups are noise
+        return sorted(elements, key=lambda element: element.clickable_id)
+
+def format_element(element):
+    return f"[{element.clickable_id}]<{element.role}>{element.label}</{element.role}>"
+
+def format_snapshot(snapshot, elements=None, omitted=0):
+    """
+    Renders a snapshot in the prompt format. elements overrides which elements are
+    listed; omitted is how many clickable ones were left out (see utils/ranker.py).
+    """
+    if snapshot.app_name == "NO_APP":
+        dom_str = "### Active app: NO_APP\n"
+    else:
+        dom_str = f"### Active app: {snapshot.app_name} ({snapshot.bundle_id})\n"
+        dom_str += "#### MacOS app elements:\n"
+        for element in (snapshot.clickable() if elements is None else elements):
+            dom_str += format_element(element) + "\n"
+        if omitted:
+            dom_str += f"({omitted} less relevant elements not shown)\n"
+        dom_str += "\n"
+    dom_str += "\n### Active app bundleids:\n"
+    for name, bundle_id in snapshot.apps:
+        dom_str += f"{name}, {bundle_id}\n"
+    return dom_str
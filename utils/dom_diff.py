@@ -0,0 +1,86 @@
+from utils.dom import format_element, format_snapshot
+
+def content(line):
+    """An element line without its id: ids are renumbered on every snapshot, so they can't match elements across turns."""
+    return line.split("]", 1)[-1]
+
+def role(line):
+    return content(line).split(">", 1)[0]
+
+def diff(old, new):
+    """
+    Returns (added, removed, changed) between two {clickable_id: line} maps, matching
+    elements by content. added and changed are lines of new; removed are lines of
+    old. A line whose element only changed its text (a typed-in field) is changed
+    when it kept its id and role.
+    """
+    same = {content(line) for line in old.values()} & {content(line) for line in new.values()}
+    added = {element_id: line for element_id, line in new.items() if content(line) not in same}
+    removed = {element_id: line for element_id, line in old.items() if content(line) not in same}
+    edited = [element_id for element_id in added if element_id in removed and role(added[element_id]) == role(removed[element_id])]
+    return ([line for element_id, line in added.items() if element_id not in edited],
+            [line for element_id, line in removed.items() if element_id not in edited],
+            [added[element_id] for element_id in edited])
+
+def format_diff(old_lines, new_lines, old_shown=None, new_shown=None):
+    """
+    old_lines/new_lines are every clickable element of the two screens, so a
+    ranker that lists a different top-K on an unchanged screen reports nothing;
+    old_shown/new_shown are the lines the model was given. Only shown elements
+    are reported as added or changed, only ones the model saw as gone, and ones it
+    saw that are still on screen but were cut from the list as no longer listed.
+    """
+    old_shown = old_lines if old_shown is None else old_shown
+    new_shown = new_lines if new_shown is None else new_shown
+    added, removed, changed = diff(old_lines, new_lines)
+    listed = {content(line) for line in new_shown.values()}
+    seen = {content(line) for line in old_shown.values()}
+    on_screen = {content(line) for line in new_lines.values()}
+    added = [line for line in added if content(line) in listed]
+    changed = [line for line in changed if content(line) in listed]
+    removed = [line for line in removed if content(line) in seen]
+    unlisted = [content(line) for line in old_shown.values() if content(line) in on_screen and content(line) not in listed]
+    text = "### SCREEN CHANGES since your last response\n"
+    if not (added or removed or changed or unlisted):
+        return text + "no visible changes\n"
+    for line in added:
+        text += f"+ {line}\n"
+    for line in changed:
+        text += f"~ {line}\n"
+    if removed:
+        text += "- gone: " + ", ".join(content(line) for line in removed) + "\n"
+    if unlisted:
+        text += "still on screen but no longer listed: " + ", ".join(unlisted) + "\n"
+    return text
+
+class DomDiffer:
+    """
+    Decides per turn whether the model gets the full prompt or the short follow-up
+    one. generateContent keeps no conversation, so every request carries the whole
+    current screen either way; what the follow-up adds is a note of what changed
+    since the last turn, so the model can judge its previous actions. The full
+    prompt is used on the first turn and whenever the active app changes. Screens
+    are compared in full, and the elements passed to render() (the ranker's pick)
+    only decide what gets reported, so a shifting pick isn't mistaken for change.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.last_app = None
+        self.last_lines = None
+        self.last_shown = None
+
+    def render(self, snapshot, elements=None, omitted=0):
+        """Returns (text, is_full). elements and omitted are as in format_snapshot."""
+        app = (snapshot.app_name, snapshot.bundle_id)
+        lines = {element.clickable_id: format_element(element) for element in snapshot.clickable()}
+        shown = lines if elements is None else {element.clickable_id: lines.get(element.clickable_id) or format_element(element) for element in elements}
+        text, is_full = format_snapshot(snapshot, elements, omitted), True
+        if self.last_lines is not None and app == self.last_app:
+            changes = format_diff(self.last_lines, lines, self.last_shown, shown)
+            # a screen that changed wholesale is described well enough by itself
+            text += "\n" + (changes if len(changes) < len(text) else "### SCREEN CHANGES since your last response\nmost of the screen changed\n")
+            is_full = False
+        self.last_app, self.last_lines, self.last_shown = app, lines, shown
+        return text, is_full
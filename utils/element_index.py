@@ -0,0 +1,242 @@
+import difflib
+import re
+
+# A query word counts as present when an element word is at least this close ("sned" -> "send")
+TOKEN_RATIO = 0.75
+# Below this a match is not trusted at all
+MIN_SCORE = 0.5
+# The best match must beat the runner-up by this much, or the target is ambiguous
+MARGIN = 0.1
+
+# Spoken role names to accessibility roles
+ROLES = {
+    "button": ["AXButton", "AXPopUpButton", "AXMenuButton"],
+    "link": ["AXLink"],
+    "text field": ["AXTextField", "AXTextArea", "AXSearchField", "AXComboBox"],
+    "search field": ["AXSearchField"],
+    "text area": ["AXTextArea"],
+    "checkbox": ["AXCheckBox"],
+    "radio button": ["AXRadioButton"],
+    "menu item": ["AXMenuItem", "AXMenuBarItem"],
+    "menu": ["AXMenuBarItem", "AXMenuButton", "AXPopUpButton"],
+    "tab": ["AXTab", "AXRadioButton"],
+    "row": ["AXRow", "AXCell", "AXOutlineRow"],
+    "image": ["AXImage"],
+    "slider": ["AXSlider"],
+}
+TEXT_ROLES = set(ROLES["text field"])
+# Trailing words in a target that name its role: "the Send button"
+ROLE_WORDS = {"button": "button", "link": "link", "field": "text field", "checkbox": "checkbox", "row": "row", "tab": "tab", "menu": "menu"}
+LABEL_ROLES = {"AXStaticText"}
+
+def words(text):
+    """Lowercase words. Unlike the ranker's tokenize, short words stay: a field may be labeled "To"."""
+    return re.findall(r"[a-z0-9]+", (text or "").lower())
+
+def role_names(role):
+    """Accessibility roles for a spoken or raw role name ("text field", "AXButton", "buttons")."""
+    name = " ".join(words(role))
+    if role.startswith("AX"):
+        return [role]
+    if name in ROLES:
+        return ROLES[name]
+    if name.rstrip("s") in ROLES:
+        return ROLES[name.rstrip("s")]
+    return ["AX" + "".join(word.capitalize() for word in name.split())]
+
+def describe(element):
+    return f"[{element.clickable_id}]<{element.role}>{element.label[:60]}"
+
+class Resolution:
+    """Result of a lookup: the element, or why there isn't exactly one."""
+    def __init__(self, element=None, candidates=(), error=None):
+        self.element = element
+        self.candidates = list(candidates)
+        self.error = error
+
+    def __bool__(self):
+        return self.element is not None
+
+    def message(self):
+        """One line for the action log, listing the candidates so the model can pick by id."""
+        if self.element is not None:
+            return describe(self.element)
+        if self.candidates:
+            return f"{self.error}: " + ", ".join(describe(element) for element in self.candidates[:5])
+        return self.error
+
+class ElementIndex:
+    """
+    Inverted index over one snapshot's clickable elements: label words and roles to
+    elements. Lets actions name their target ("click the Send button") instead of
+    an id; lookups score exact labels above substrings above word overlap, with
+    fuzzy word matching, and refuse to guess between near-equal candidates.
+    """
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.elements = snapshot.clickable()
+        self.words = {}
+        self.roles = {}
+        self.labels = {}
+        for element in self.elements:
+            self.labels[element.clickable_id] = " ".join(words(element.label))
+            for word in set(words(element.label)):
+                self.words.setdefault(word, set()).add(element.clickable_id)
+            self.roles.setdefault(element.role, []).append(element)
+
+    def word_matches(self, word):
+        if word in self.words:
+            return {word: 1.0}
+        return {close: difflib.SequenceMatcher(None, word, close).ratio()
+                for close in difflib.get_close_matches(word, self.words, n=3, cutoff=TOKEN_RATIO)}
+
+    def score(self, element, query, matches):
+        label = self.labels[element.clickable_id]
+        if not label:
+            return 0.0
+        if label == query:
+            return 1.0
+        element_words = set(label.split())
+        overlap = sum(max((ratio for close, ratio in matches[word].items() if close in element_words), default=0.0) for word in matches)
+        score = overlap / len(matches)
+        if f" {query} " in f" {label} ":
+            score = max(score, 0.9)
+        # prefer tight labels: "Send" over "Send later to everyone"
+        return score * (0.7 + 0.3 * min(1.0, len(matches) / len(element_words)))
+
+    def candidates(self, text, roles=None):
+        """Elements matching text, best first, as (score, element)."""
+        query = " ".join(word for word in words(text) if word not in ("the", "a", "an"))
+        if not query:
+            return []
+        matches = {word: self.word_matches(word) for word in query.split()}
+        ids = set().union(*(self.words[close] for closes in matches.values() for close in closes))
+        pool = [element for element in self.elements if element.clickable_id in ids]
+        if roles:
+            pool = [element for element in pool if element.role in roles]
+        scored = [(self.score(element, query, matches), element) for element in pool]
+        return sorted((pair for pair in scored if pair[0] >= MIN_SCORE), key=lambda pair: (-pair[0], pair[1].clickable_id))
+
+    def pick(self, scored, what):
+        if not scored:
+            return Resolution(error=f"no element matches {what}")
+        exact = [element for score, element in scored if score == 1.0]
+        if len(exact) == 1:
+            return Resolution(exact[0]) # "Send" beats "Send later"
+        best = scored[0][0]
+        close = [element for score, element in scored if best - score < MARGIN]
+        if len(close) > 1:
+            return Resolution(candidates=close, error=f"{what} is ambiguous")
+        return Resolution(scored[0][1])
+
+    def find(self, text, role=None):
+        """The element whose label best matches text, optionally limited to a role."""
+        roles = role_names(role) if role else None
+        what = repr(text) + (f" ({role})" if role else "")
+        found = self.pick(self.candidates(text, roles), what)
+        *rest, last = words(text) or [""]
+        if not found and role is None and rest and last in ROLE_WORDS:
+            retry = self.find(" ".join(rest), ROLE_WORDS[last])
+            if retry:
+                return retry
+        return found
+
+    def find_labeled(self, label):
+        """
+        The text field label names: by its own title/placeholder, or else the
+        field right after a static text with that label (forms often put "To:"
+        beside the field rather than on it).
+        """
+        fields = [pair for pair in self.candidates(label) if pair[1].role in TEXT_ROLES]
+        if fields:
+            return self.pick(fields, f"field labeled {label!r}")
+        texts = [element for element in self.snapshot.elements if element.role in LABEL_ROLES
+                 and words(element.label) == words(label)]
+        for text in texts:
+            following = [element for element in self.elements if element.role in TEXT_ROLES and element.id > text.id]
+            same_parent = [element for element in following if element.parent == text.parent]
+            field = (same_parent or following or [None])[0]
+            if field is not None:
+                return Resolution(field)
+        return Resolution(error=f"no text field labeled {label!r}")
+
+    def find_role(self, role, text=None, index=None):
+        """An element of a role: the one matching text, the index-th (0-based, -1 for last), or the only one."""
+        roles = role_names(role)
+        if text:
+            return self.find(text, role)
+        elements = [element for name in roles for element in self.roles.get(name, [])]
+        elements.sort(key=lambda element: element.clickable_id)
+        if not elements:
+            return Resolution(error=f"no {role} on screen")
+        if index is not None:
+            try:
+                return Resolution(elements[int(index)])
+            except (IndexError, ValueError):
+                return Resolution(candidates=elements, error=f"no {role} number {index}")
+        if len(elements) > 1:
+            return Resolution(candidates=elements, error=f"{len(elements)} elements are {role}, pass text or index")
+        return Resolution(elements[0])
+
+def relocate(element, snapshot):
+    """
+    The element of snapshot that is the same control as element from an earlier
+    snapshot, or None. Tries the strictest key that still names exactly one
+    element: role, label and bounds; then without the value, which typing changes;
+    then label or bounds alone.
+    """
+    named = (element.title, element.description, element.placeholder, element.text)
+    keys = [lambda e: (e.role, e.label, e.bounds), lambda e: (e.role, e.title, e.description, e.placeholder, e.text, e.bounds),
+            lambda e: (e.role, e.label)]
+    if any(named):
+        keys.append(lambda e: (e.role, e.title, e.description, e.placeholder, e.text))
+    if element.bounds is not None:
+        keys.append(lambda e: (e.role, e.bounds))
+    candidates = [candidate for candidate in snapshot.elements if candidate.clickable_id is not None]
+    for key in keys:
+        matches = [candidate for candidate in candidates if key(candidate) == key(element)]
+        if len(matches) == 1:
+            return matches[0]
+    return None
+
+class ScreenIds:
+    """
+    Maps the model's element ids within one batch of actions. The ids number seen,
+    the snapshot the model was shown, and so does the executor until something
+    takes a new snapshot (a label lookup, a compound step), which renumbers them.
+    From then on each id is looked up on seen and relocated on the latest screen,
+    so it still means the element the model picked, or fails if that is gone.
+    Without seen, the first snapshot taken stands in for it.
+    """
+    def __init__(self, executor, seen=None):
+        self.executor = executor
+        self.seen = seen
+        self.live = seen # the snapshot the executor's ids currently follow
+        self.stale = seen is None
+
+    def changed(self):
+        """Call after anything that may have changed the screen."""
+        self.stale = True
+
+    def current(self):
+        """The screen as it is now; the executor's ids follow it from here on."""
+        if self.stale:
+            self.live = self.executor.get_snapshot()
+            self.stale = False
+            if self.seen is None:
+                self.seen = self.live
+        return self.live
+
+    def element(self, model_id):
+        """(element as numbered on the executor's latest snapshot, None) or (None, why not)."""
+        if self.seen is None:
+            self.current()
+        element = self.seen.element(model_id)
+        if element is None:
+            return None, f"no element {model_id}"
+        if self.live is self.seen:
+            return element, None
+        moved = relocate(element, self.current())
+        if moved is None:
+            return None, f"{describe(element)} is no longer on screen"
+        return moved, None
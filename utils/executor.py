@@ -1,65 +1,127 @@
-import subprocess, os, ctypes
-from typing import Optional, List
-import pyautogui
-import pyperclip
+import os, importlib
+from abc import ABC, abstractmethod
+from typing import List
 import time
+from utils.dom import DOMSnapshot, format_snapshot
+from utils.settle import wait_for_settle, policy
 
-class Executor:
-    def __init__(self):
-        try:
-            # Compile the Swift code to a dynamic library
-            result = subprocess.run(["swiftc", "-emit-library", "swift/Executor.swift", "swift/DOM.swift", "-o", "libexecutor.dylib"], check=True)            
-            if result.returncode != 0:
-                print(f"Swift compilation error: {result.stderr}")
-                raise Exception(f"Swift compilation failed with code {result.returncode}")
-            # Code sign the library with entitlements
-            subprocess.run(["codesign", "-s", "-", "--entitlements", "swift/Executor.entitlements", "libexecutor.dylib"], check=True)
-            self.lib = ctypes.CDLL("./libexecutor.dylib")
+class ExecutorBackend(ABC):
+    """
+    What Executor needs from a UI backend. MacBackend (utils/mac_backend.py) drives
+    the real screen; SimulatedBackend (utils/simulator.py) runs headless from data files.
+    A backend missing one of the abstract methods fails when it is instantiated.
+    """
+    @abstractmethod
+    def open_app(self, bundle_id: str) -> bool:
+        raise NotImplementedError
+    @abstractmethod
+    def click_element(self, element_id: int) -> bool:
+        raise NotImplementedError
+    @abstractmethod
+    def type_in_element(self, element_id: int, text: str) -> bool:
+        raise NotImplementedError
+    @abstractmethod
+    def hotkey(self, keys: List[str]) -> bool:
+        raise NotImplementedError
+    def select_menu_path(self, path: List[str]) -> bool:
+        """Presses the menu item at path, menu titles from the menu bar down."""
+        print(f"❌ Error: {type(self).__name__} can't reach menus")
+        return False
+    def wait(self, seconds: float) -> bool:
+        time.sleep(seconds)
+        print(f"✅ waited {seconds} sec")
+        return True
+    @abstractmethod
+    def get_snapshot(self) -> DOMSnapshot:
+        raise NotImplementedError
+    def ui_fingerprint(self):
+        """
+        Cheap (bundle_id, digest) of what's on screen, used to wait for the UI to
+        settle after an action. None means the backend has no probe and handles
+        timing itself.
+        """
+        return None
 
-            self.lib.openApp.argtypes, self.lib.openApp.restype = [ctypes.c_char_p], ctypes.c_bool
-            self.lib.clickElement.argtypes, self.lib.clickElement.restype = [ctypes.c_int32], ctypes.c_bool
-            self.lib.get_dom_str.restype = ctypes.c_char_p
-        except Exception as e: print(f"Failed to initialize Executor: {e}"); raise
+class Executor:
+    def __init__(self, backend: ExecutorBackend = None):
+        if backend is None:
+            from utils.mac_backend import MacBackend # needs macOS, so only imported when used
+            backend = MacBackend()
+        self.backend = backend
     
+    def settle(self, kind, before=None, **kwargs):
+        """Waits for the UI to stop changing after an action (see utils/settle.py)."""
+        if before is not None:
+            wait_for_settle(self.backend.ui_fingerprint, kind, before, **kwargs)
+
     # action 1
     def open_app(self, bundle_id: str) -> bool:
-        return self.lib.openApp(bundle_id.encode('utf-8'))
+        before = self.backend.ui_fingerprint()
+        result = self.backend.open_app(bundle_id)
+        if result and before is not None:
+            # launching is asynchronous: wait for the app to come to the front, then settle
+            self.settle("open_app", before, ready=lambda fingerprint: fingerprint[0] == bundle_id,
+                        require_change=before[0] != bundle_id)
+        return result
     # action 2
     def click_element(self, element_id: int) -> bool:
-        return self.lib.clickElement(ctypes.c_int32(element_id))
+        before = self.backend.ui_fingerprint()
+        result = self.backend.click_element(element_id)
+        if result:
+            self.settle("click", before)
+        return result
     # action 3
     def type_in_element(self, element_id: int, text: str) -> bool:
-        if not self.lib.clickElement(ctypes.c_int32(element_id)): # activate element first
-            return False
-        original_clipboard = pyperclip.paste() # was pyautogui.write(text)
-        try:
-            pyperclip.copy(text)
-            pyautogui.keyDown('command')
-            pyautogui.press('v')
-            pyautogui.keyUp('command')
-            time.sleep(0.1)
-        finally:
-            pyperclip.copy(original_clipboard)
-        print("✅ typed text fast:", text, "into elementid=", element_id)
-        return True
+        before = self.backend.ui_fingerprint()
+        result = self.backend.type_in_element(element_id, text)
+        if result:
+            self.settle("type", before)
+        return result
     # action 4
     def hotkey(self, keys: List[str]) -> bool:
-        modified_keys = [key.replace('control', 'ctrl').replace('cmd', 'command') if isinstance(key, str) else key for key in keys]
-        pyautogui.hotkey(*modified_keys)
-        print("✅ pressed keys:", modified_keys)
-        return True
+        before = self.backend.ui_fingerprint()
+        result = self.backend.hotkey(keys)
+        if result:
+            self.settle("hotkey", before)
+        return result
     # action 5
     def wait(self, seconds: float) -> bool:
-        time.sleep(seconds)
-        print(f"✅ waited {seconds} sec")
+        # With a probe, a wait ends early once the screen has changed (the thing being
+        # waited for) and then held still for a moment; if nothing changes it lasts
+        # the full time
+        before = self.backend.ui_fingerprint()
+        if before is None:
+            return self.backend.wait(seconds)
+        start = time.perf_counter()
+        self.settle("wait", before, timeout=seconds, quiet=min(seconds, policy("wait")["quiet"]))
+        print(f"✅ waited {time.perf_counter() - start:.2f} of {seconds} sec")
         return True
-    
 
+    # used by the select_menu_path compound action
+    def select_menu_path(self, path: List[str]) -> bool:
+        before = self.backend.ui_fingerprint()
+        result = self.backend.select_menu_path(path)
+        if result:
+            self.settle("click", before)
+        return result
+
+    def get_snapshot(self) -> DOMSnapshot:
+        return self.backend.get_snapshot()
     def get_dom_str(self) -> str:
-        result = self.lib.get_dom_str()
-        dom_str = result.decode('utf-8') if result else ""
-        return dom_str
-    def __del__(self): 
-        try:
-            if os.path.exists("libexecutor.dylib"): os.remove("libexecutor.dylib")
-        except: pass
+        return format_snapshot(self.get_snapshot())
+
+def load_executor(spec=None):
+    """
+    Builds an Executor for the backend named by spec or $ZEUS_EXECUTOR:
+      "macos" (default)   the Swift/Accessibility backend
+      "sim:<path>"        the headless simulator, loaded from a JSON scenario file
+      "module:ClassName"  any other ExecutorBackend, constructed with no arguments
+    """
+    spec = spec or os.environ.get("ZEUS_EXECUTOR", "macos")
+    if spec == "macos":
+        return Executor()
+    if spec.startswith("sim:"):
+        from utils.simulator import SimulatedBackend
+        return Executor(SimulatedBackend.from_file(spec[4:]))
+    module_name, _, class_name = spec.partition(":")
+    return Executor(getattr(importlib.import_module(module_name), class_name)())
@@ -0,0 +1,151 @@
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import inspect
+import threading
+import asyncio
+import time
+
+# Lower runs first
+HIGH, NORMAL, LOW = 0, 5, 10
+
+# Shared by every scheduler so a job id is unique across lanes
+_ids = itertools.count(1)
+
+class Job:
+    """One submitted command. fn runs on the scheduler's worker thread and receives
+    the job's cancel event as its cancel= keyword argument when it accepts one."""
+    def __init__(self, job_id, fn, args, kwargs, name, priority, timeout):
+        self.id = job_id
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.name = name
+        self.priority = priority
+        self.timeout = timeout
+        self.status = "queued" # queued | running | done | failed | cancelled | timed_out
+        self.result = None
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+        self.done = asyncio.get_running_loop().create_future()
+
+    @property
+    def waited(self):
+        return (self.started or time.monotonic()) - self.submitted
+
+    @property
+    def duration(self):
+        return None if self.started is None else (self.finished or time.monotonic()) - self.started
+
+    def __repr__(self):
+        return f"Job(#{self.id}, {self.name!r}, {self.status})"
+
+class JobScheduler:
+    """
+    Runs blocking jobs (agent.run) off the event loop, one at a time by default,
+    since UI jobs share a single screen. submit() returns at once with a Job whose
+    done future resolves when it finishes. Queued jobs start in priority order
+    (then submission order); cancel() drops a queued job or asks a running one to
+    stop at its next iteration. A job over its timeout is asked to stop the same
+    way, and the next job waits until the screen is actually free.
+    """
+    def __init__(self, name="ui", workers=1):
+        self.name = name
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"zeus-{name}")
+        self.queue = None
+        self.jobs = {}
+        self.running = {}
+        self.order = itertools.count()
+        self.durations = [] # recent run times, for wait estimates
+        self.tasks = []
+
+    def start(self):
+        """Starts the workers; call from inside the event loop."""
+        if not self.tasks:
+            self.queue = asyncio.PriorityQueue()
+            self.tasks = [asyncio.get_running_loop().create_task(self._worker()) for _ in range(self.workers)]
+        return self
+
+    def submit(self, fn, *args, name=None, priority=NORMAL, timeout=None, **kwargs):
+        self.start()
+        job = Job(next(_ids), fn, args, kwargs, name or getattr(fn, "__name__", "job"), priority, timeout)
+        self.jobs[job.id] = job
+        self.queue.put_nowait((priority, next(self.order), job))
+        return job
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None or job.status not in ("queued", "running"):
+            return False
+        job.cancel_event.set()
+        if job.status == "queued":
+            self._finish(job, "cancelled")
+        return True
+
+    def pending(self):
+        """Queued jobs in the order they will run."""
+        return sorted((job for job in self.jobs.values() if job.status == "queued"), key=lambda job: (job.priority, job.id))
+
+    def position(self, job):
+        """1-based place in the queue counting running jobs, 0 once it is running."""
+        if job.status != "queued":
+            return 0
+        return len(self.running) + self.pending().index(job) + 1
+
+    def estimated_wait(self, job):
+        """Rough seconds until job starts, from recent job durations."""
+        if job.status != "queued":
+            return 0.0
+        recent = self.durations[-20:]
+        average = sum(recent) / len(recent) if recent else 60.0
+        ahead = self.pending().index(job)
+        remaining = sum(max(0.0, average - (running.duration or 0.0)) for running in self.running.values())
+        return (remaining + ahead * average) / self.workers
+
+    def _finish(self, job, status, result=None, error=None):
+        job.status, job.result, job.error = status, result, error
+        job.finished = time.monotonic()
+        if not job.done.done():
+            job.done.set_result(job)
+        # keep a short history for !jobs
+        finished = [old for old in self.jobs.values() if old.finished is not None]
+        for old in sorted(finished, key=lambda old: old.finished)[:-50]:
+            self.jobs.pop(old.id, None)
+
+    def _call(self, job):
+        try:
+            accepts_cancel = "cancel" in inspect.signature(job.fn).parameters
+        except (TypeError, ValueError):
+            accepts_cancel = False
+        if accepts_cancel:
+            return job.fn(*job.args, cancel=job.cancel_event, **job.kwargs)
+        return job.fn(*job.args, **job.kwargs)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            _, _, job = await self.queue.get()
+            if job.status != "queued":
+                continue # cancelled while waiting
+            job.status, job.started = "running", time.monotonic()
+            self.running[job.id] = job
+            future = loop.run_in_executor(self.pool, self._call, job)
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), job.timeout)
+                self._finish(job, "cancelled" if job.cancel_event.is_set() else "done", result=result)
+            except asyncio.TimeoutError:
+                job.cancel_event.set()
+                print(f"⏱️ Job #{job.id} timed out after {job.timeout}s, stopping it")
+                try:
+                    await future # the screen is only free once the run has actually stopped
+                except Exception:
+                    pass
+                self._finish(job, "timed_out")
+            except Exception as e:
+                self._finish(job, "failed", error=e)
+            finally:
+                self.running.pop(job.id, None)
+                self.durations = self.durations[-19:] + [job.duration]
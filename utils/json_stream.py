@@ -0,0 +1,97 @@
+import json
+
+class ActionStreamParser:
+    """
+    Incremental parser for the agent's response format.
+
+    Feed it text chunks as they stream in; feed() returns every item of the
+    top-level "actions" array that has been completed since the last call.
+    The top-level "current_state" object is exposed as soon as it closes.
+    items counts every "actions" item passed so far, including ones that weren't
+    objects or didn't parse and so were never returned.
+    """
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.string_start = None
+        self.last_key = None
+        self.actions_depth = None
+        self.item_start = None
+        self.in_scalar = False
+        self.items = 0
+        self.state_start = None
+        self.current_state = None
+        self.done = False
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        completed = []
+        buffer = self.buffer
+        while self.pos < len(buffer) and not self.done:
+            char = buffer[self.pos]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1:
+                        self.last_key = buffer[self.string_start + 1:self.pos]
+            elif char == '"' and self.depth > 0:
+                self.in_string = True
+                self.string_start = self.pos
+                if self.depth == self.actions_depth:
+                    self.in_scalar = True # a string item
+            elif char in "{[":
+                if self.depth == 0 and char == "[":
+                    pass # stray bracket in text before the JSON object
+                elif self.depth == 1 and char == "[" and self.last_key == "actions":
+                    self.actions_depth = 2
+                    self.depth += 1
+                elif self.depth == 1 and char == "{" and self.last_key == "current_state":
+                    self.state_start = self.pos
+                    self.depth += 1
+                else:
+                    if self.depth == self.actions_depth and char == "{":
+                        self.item_start = self.pos
+                    self.depth += 1
+            elif char in "}]" and self.depth > 0:
+                self.depth -= 1
+                if self.depth == self.actions_depth:
+                    self.items += 1
+                    if self.item_start is not None:
+                        item = self._load(buffer[self.item_start:self.pos + 1])
+                        if isinstance(item, dict):
+                            completed.append(item)
+                        self.item_start = None
+                elif self.actions_depth is not None and self.depth < self.actions_depth:
+                    self._end_scalar()
+                    self.actions_depth = None
+                elif self.state_start is not None and self.depth == 1:
+                    self.current_state = self._load(buffer[self.state_start:self.pos + 1])
+                    self.state_start = None
+                if self.depth == 0:
+                    self.done = True
+            elif self.depth == self.actions_depth:
+                if char == ",":
+                    self._end_scalar()
+                elif not char.isspace():
+                    self.in_scalar = True # a number, true, false or null item
+            self.pos += 1
+        return completed
+
+    def _end_scalar(self):
+        if self.in_scalar:
+            self.items += 1
+            self.in_scalar = False
+
+    def _load(self, text):
+        try:
+            return json.loads(text, strict=False)
+        except ValueError as e:
+            print(f"Error parsing streamed JSON: {e}, text: {text}")
+            return None
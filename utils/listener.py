@@ -0,0 +1,84 @@
+import threading
+import asyncio
+import time
+import os
+from utils.audio import Capture, RATE, CHUNK
+from utils.speech import CommandRecognizer, ResidentModel, WAKE_MODEL, COMMAND_MODEL, COMPUTE_TYPE
+
+# Minutes of no commands after which the command model is unloaded (0 keeps it warm).
+# The wake model is small and needed continuously, so it always stays loaded.
+IDLE_MINUTES = float(os.environ.get("ZEUS_WHISPER_IDLE_MINUTES", 0))
+MAINTENANCE_SECONDS = 5
+
+class ListenerService:
+    """
+    Continuous voice control: one input stream and the Whisper models, owned by a
+    background thread for the life of the process. Recognized commands are pushed
+    onto an asyncio queue, so audio spoken while a command runs is still heard, and
+    nothing reopens the device between commands.
+
+        listener = ListenerService()
+        commands = listener.start() # from inside the event loop
+        command = await commands.get()
+    """
+    def __init__(self, source=None, wake_model=WAKE_MODEL, command_model=COMMAND_MODEL, compute_type=COMPUTE_TYPE,
+                 idle_minutes=IDLE_MINUTES, on_partial=None):
+        self.source = source
+        self.wake_model = ResidentModel(wake_model, compute_type)
+        self.command_model = ResidentModel(command_model, compute_type, idle_seconds=idle_minutes * 60 or None)
+        self.on_partial = on_partial or (lambda text: print(f"📝 {text}"))
+        self.loop = None
+        self.queue = None
+        self.thread = None
+        self.stopping = threading.Event()
+        self.commands_heard = 0
+
+    def start(self, loop=None):
+        """Starts listening and returns the asyncio queue commands arrive on."""
+        self.loop = loop or asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, name="zeus-listener", daemon=True)
+        self.thread.start()
+        return self.queue
+
+    def stop(self, timeout=2.0):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def _publish(self, command):
+        self.commands_heard += 1
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, command)
+
+    def _run(self):
+        source = self.source or Capture(rate=RATE, chunk=CHUNK)
+        try:
+            self.wake_model.load() # warm both up before the first wake phrase
+            self.command_model.load()
+            recognizer = CommandRecognizer(source, self.wake_model, self.command_model, on_partial=self.on_partial, rate=source.rate)
+            source.start()
+            print("🎤 Listening for 'Hey Zeus'...")
+            next_maintenance = time.monotonic() + MAINTENANCE_SECONDS
+            while not self.stopping.is_set():
+                chunk = source.read(timeout=0.5)
+                if chunk is None and getattr(source, "exhausted", False):
+                    break
+                if chunk is not None:
+                    try:
+                        command = recognizer.feed(chunk)
+                    except Exception as e:
+                        print(f"❌ Error in speech processing: {e}")
+                        recognizer.listen()
+                        command = None
+                    if command:
+                        print(f"➡️ Heard command: {command}")
+                        self._publish(command)
+                if time.monotonic() >= next_maintenance:
+                    self.command_model.release_if_idle()
+                    next_maintenance = time.monotonic() + MAINTENANCE_SECONDS
+        except Exception as e:
+            print(f"❌ Listener stopped: {e}")
+        finally:
+            source.stop()
@@ -0,0 +1,131 @@
+import threading
+import json
+import os
+import requests
+import utils.tracing as tracing
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# GEMINI_API_BASE can point at a local mock server, e.g. http://127.0.0.1:8080/v1beta
+API_BASE = os.environ.get("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta")
+MODEL = os.environ.get("GEMINI_MODEL", "gemini-2.0-flash")
+CONNECT_TIMEOUT = float(os.environ.get("GEMINI_CONNECT_TIMEOUT", 3.05))
+READ_TIMEOUT = float(os.environ.get("GEMINI_READ_TIMEOUT", 60))
+MAX_RETRIES = int(os.environ.get("GEMINI_MAX_RETRIES", 2))
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """Returns the shared keep-alive session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=MAX_RETRIES,
+                backoff_factor=0.25,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(["POST"]),
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=8, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+def build_request(prompt, system=None, max_output_tokens=4192):
+    request_body = {
+        "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+        "generationConfig": {"temperature": 1, "topK": 40, "topP": 0.95, "maxOutputTokens": max_output_tokens},
+    }
+    if system:
+        request_body["systemInstruction"] = {"parts": [{"text": system}]}
+    return request_body
+
+def extract_text(data):
+    candidates = data.get("candidates", [])
+    if not candidates:
+        if "error" in data:
+            print(f"LLM error: {data['error'].get('message', data['error'])}")
+        return ""
+    parts = candidates[0].get("content", {}).get("parts", [])
+    return "".join(part.get("text", "") for part in parts)
+
+def usage_attributes(data):
+    usage = data.get("usageMetadata") or {}
+    return {key: usage[name] for key, name in (
+        ("prompt_tokens", "promptTokenCount"),
+        ("output_tokens", "candidatesTokenCount"),
+        ("total_tokens", "totalTokenCount"),
+    ) if name in usage}
+
+def generate(prompt, system=None, max_output_tokens=4192):
+    """Sends one generateContent request and returns the response text ("" on failure)."""
+    url = f"{API_BASE}/models/{MODEL}:generateContent"
+    try:
+        response = get_session().post(
+            url,
+            params={"key": os.environ.get("GEMINI_API_KEY")},
+            json=build_request(prompt, system, max_output_tokens),
+            timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+        )
+        data = response.json()
+        tracing.annotate(**usage_attributes(data))
+        return extract_text(data)
+    except (requests.RequestException, ValueError) as e:
+        print(f"LLM request error: {e}")
+        return ""
+
+def strip_json(text):
+    """Strips code fences and surrounding prose from a model response."""
+    if "```json" in text:
+        text = text.split("```json", 1)[1]
+    text = text.replace("```", "").strip()
+    if "{" in text and "}" in text:
+        text = text[text.find("{"):text.rfind("}") + 1].strip()
+    return text
+
+def parse_json(text):
+    """Parses a JSON object out of a model response. Raises ValueError if it can't."""
+    return json.loads(strip_json(text), strict=False) # allows \t and other chars which could cause issues
+
+def parse_event(line, usage=None):
+    """Returns the text of one SSE "data:" line, or None for any other line."""
+    line = line.strip()
+    if not line.startswith(b"data:"):
+        return None
+    data = json.loads(line[5:])
+    if usage is not None:
+        usage.update(usage_attributes(data))
+    return extract_text(data)
+
+def stream_generate(prompt, system=None, max_output_tokens=4192, usage=None):
+    """
+    Yields response text chunks from streamGenerateContent as they arrive. If usage
+    is a dict it is filled with the token counts once the stream reports them.
+    """
+    url = f"{API_BASE}/models/{MODEL}:streamGenerateContent"
+    try:
+        with get_session().post(
+            url,
+            params={"key": os.environ.get("GEMINI_API_KEY"), "alt": "sse"},
+            json=build_request(prompt, system, max_output_tokens),
+            timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+            stream=True,
+        ) as response:
+            pending = b""
+            # chunk_size=None hands over each transfer chunk as soon as it is read
+            for chunk in response.iter_content(chunk_size=None):
+                pending += chunk
+                *lines, pending = pending.split(b"\n")
+                for line in lines:
+                    text = parse_event(line, usage)
+                    if text is not None:
+                        yield text
+            text = parse_event(pending, usage)
+            if text is not None:
+                yield text
+    except (requests.RequestException, ValueError) as e:
+        print(f"LLM stream error: {e}")
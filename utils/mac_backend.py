@@ -0,0 +1,76 @@
+import ctypes
+from typing import List
+import pyautogui
+import pyperclip
+from utils.dom import DOMSnapshot
+from utils.executor import ExecutorBackend
+from utils.settle import wait_for_settle
+import utils.swift_build as swift_build
+
+class MacBackend(ExecutorBackend):
+    """Drives the real screen through the Swift Accessibility library and pyautogui."""
+    def __init__(self):
+        try:
+            # Compiled and signed once per source/toolchain version, then loaded from the cache
+            self.lib = ctypes.CDLL(swift_build.library_path())
+
+            self.lib.openApp.argtypes, self.lib.openApp.restype = [ctypes.c_char_p], ctypes.c_bool
+            self.lib.clickElement.argtypes, self.lib.clickElement.restype = [ctypes.c_int32], ctypes.c_bool
+            self.lib.get_dom_json.restype = ctypes.c_void_p
+            self.lib.free_dom_str.argtypes, self.lib.free_dom_str.restype = [ctypes.c_void_p], None
+            self.lib.get_ui_fingerprint.restype = ctypes.c_void_p
+            self.lib.selectMenuPath.argtypes, self.lib.selectMenuPath.restype = [ctypes.c_char_p], ctypes.c_bool
+        except Exception as e: print(f"Failed to initialize MacBackend: {e}"); raise
+    
+    # action 1
+    def open_app(self, bundle_id: str) -> bool:
+        return self.lib.openApp(bundle_id.encode('utf-8'))
+    # action 2
+    def click_element(self, element_id: int) -> bool:
+        return self.lib.clickElement(ctypes.c_int32(element_id))
+    # action 3
+    def type_in_element(self, element_id: int, text: str) -> bool:
+        before = self.ui_fingerprint()
+        if not self.lib.clickElement(ctypes.c_int32(element_id)): # activate element first
+            return False
+        wait_for_settle(self.ui_fingerprint, "click", before)
+        original_clipboard = pyperclip.paste() # was pyautogui.write(text)
+        try:
+            pyperclip.copy(text)
+            before = self.ui_fingerprint()
+            pyautogui.keyDown('command')
+            pyautogui.press('v')
+            pyautogui.keyUp('command')
+            # the clipboard can only be restored once the paste has landed
+            wait_for_settle(self.ui_fingerprint, "paste", before)
+        finally:
+            pyperclip.copy(original_clipboard)
+        print("✅ typed text fast:", text, "into elementid=", element_id)
+        return True
+    # action 4
+    def hotkey(self, keys: List[str]) -> bool:
+        modified_keys = [key.replace('control', 'ctrl').replace('cmd', 'command') if isinstance(key, str) else key for key in keys]
+        pyautogui.hotkey(*modified_keys)
+        print("✅ pressed keys:", modified_keys)
+        return True
+    def select_menu_path(self, path: List[str]) -> bool:
+        return self.lib.selectMenuPath("\n".join(path).encode('utf-8'))
+
+    def get_snapshot(self) -> DOMSnapshot:
+        pointer = self.lib.get_dom_json()
+        if not pointer:
+            return DOMSnapshot("Unknown", "")
+        try:
+            data = ctypes.string_at(pointer).decode('utf-8')
+        finally:
+            self.lib.free_dom_str(pointer)
+        return DOMSnapshot.from_json(data)
+    def ui_fingerprint(self):
+        pointer = self.lib.get_ui_fingerprint()
+        if not pointer:
+            return ("", "")
+        try:
+            bundle_id, _, digest = ctypes.string_at(pointer).decode('utf-8').rpartition("|")
+        finally:
+            self.lib.free_dom_str(pointer)
+        return (bundle_id, digest)
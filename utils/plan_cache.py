@@ -0,0 +1,110 @@
+import sys
+import re
+from utils.cache import DiskLRU
+
+# Parametric task templates. A plan cached for one task that matches a template is
+# stored with its slot values replaced by {slot} markers, so any later task matching
+# the same template reuses it with the new values filled in.
+TEMPLATES = [
+    ("send_text", re.compile(r"^send an? (?:text|text message|message|imessage) to (?P<recipient>.+?) (?:saying|that says) (?P<message>.+)$", re.IGNORECASE)),
+    ("create_folder", re.compile(r"^create an? (?:new )?folder (?:called|named) (?P<name>.+?) in (?:my )?(?P<location>.+?)(?: folder)?$", re.IGNORECASE)),
+    ("set_appointment", re.compile(r"^(?:set|schedule|add) an? (?P<title>.+?) (?:appointment|event|meeting) (?:for|on) (?P<when>.+)$", re.IGNORECASE)),
+    ("set_reminder", re.compile(r"^(?:remind me to|set a reminder to) (?P<title>.+?) (?P<when>(?:at|on|today|tomorrow)\b.*)$", re.IGNORECASE)),
+    ("play", re.compile(r"^play (?P<query>.+?) on (?P<app>youtube music|spotify|music)$", re.IGNORECASE)),
+    ("search", re.compile(r"^search (?:for )?(?P<query>.+?) on (?P<site>.+)$", re.IGNORECASE)),
+]
+
+cache = DiskLRU("plans.json", max_entries=256)
+
+def normalize(task):
+    """Lowercases, collapses whitespace and drops trailing punctuation."""
+    return re.sub(r"\s+", " ", task).strip().rstrip(".!?").strip().lower()
+
+def match_template(task):
+    """Returns (template_name, slots) for the first matching template, or (None, None)."""
+    text = re.sub(r"\s+", " ", task).strip().rstrip(".!?").strip()
+    for name, pattern in TEMPLATES:
+        match = pattern.match(text)
+        if match:
+            slots = {key: (value or "").strip().strip("'\"") for key, value in match.groupdict().items()}
+            if not all(slots.values()):
+                continue # an empty slot would make different tasks share a key
+            return name, slots
+    return None, None
+
+def fill(steps, slots):
+    filled = []
+    for step in steps:
+        for key, value in slots.items():
+            step = step.replace("{" + key + "}", value)
+        filled.append(step)
+    return filled
+
+def parametrize(steps, slots):
+    """Replaces slot values in steps with {slot} markers. Returns None unless every slot is used."""
+    used = set()
+    parametrized = []
+    # Longest values first so a short slot can't clobber part of a longer one
+    ordered = sorted(slots.items(), key=lambda item: len(item[1]), reverse=True)
+    for step in steps:
+        for key, value in ordered:
+            pattern = re.compile(r"(?<!\w)" + re.escape(value) + r"(?!\w)", re.IGNORECASE)
+            if pattern.search(step):
+                step = pattern.sub(lambda _: "{" + key + "}", step)
+                used.add(key)
+        parametrized.append(step)
+    return parametrized if used == set(slots) else None
+
+def lookup(task):
+    """Returns cached plan steps for task (exact or via a template), or None on a miss."""
+    steps = cache.get("task:" + normalize(task))
+    if steps is None:
+        name, slots = match_template(task)
+        if name:
+            template_steps = cache.get(f"template:{name}:{','.join(sorted(slots))}")
+            if template_steps is not None:
+                steps = fill(template_steps, slots)
+    cache.record(steps is not None)
+    return steps
+
+def store(task, steps):
+    cache.put("task:" + normalize(task), steps)
+    name, slots = match_template(task)
+    if name:
+        template_steps = parametrize(steps, slots)
+        if template_steps is not None:
+            cache.put(f"template:{name}:{','.join(sorted(slots))}", template_steps)
+
+def invalidate(task=None):
+    """Drops the cached plan for task (and its template), or the whole cache if task is None."""
+    if task is None:
+        cache.clear()
+        return True
+    removed = cache.remove("task:" + normalize(task))
+    name, slots = match_template(task)
+    if name:
+        removed = cache.remove(f"template:{name}:{','.join(sorted(slots))}") or removed
+    return removed
+
+def stats():
+    lookups = cache.stats["hits"] + cache.stats["misses"]
+    return {
+        "entries": len(cache.entries),
+        "hits": cache.stats["hits"],
+        "misses": cache.stats["misses"],
+        "hit_rate": cache.stats["hits"] / lookups if lookups else 0.0,
+    }
+
+if __name__ == "__main__":
+    # python -m utils.plan_cache [stats | clear | invalidate "<task>"]
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "clear":
+        invalidate()
+        print("✅ plan cache cleared")
+    elif command == "invalidate" and len(sys.argv) > 2:
+        task = " ".join(sys.argv[2:])
+        print(f"✅ invalidated: {task}" if invalidate(task) else f"❌ not cached: {task}")
+    elif command == "stats":
+        print(stats())
+    else:
+        print('usage: python -m utils.plan_cache [stats | clear | invalidate "<task>"]')
@@ -1,8 +1,12 @@
-import requests
-import json
-import os
+import utils.llm as llm
+import utils.plan_cache as plan_cache
 
 def plan(task):
+    cached = plan_cache.lookup(task)
+    if cached is not None:
+        print("⚡ Reusing cached plan")
+        return cached
+
     prompt = f"""
     ### GOAL: {task}
     
@@ -50,15 +54,7 @@ def plan(task):
     Your steps should be specific, actionable instructions that clearly describe what needs to be done. Only include actions that are necessary to complete the goal. Include verification steps where appropriate to confirm progress.
     """
     
-    api_key = os.environ.get("GEMINI_API_KEY")
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}"
-    
-    request_body = {
-        "contents": [{"role": "user", "parts": [{"text": prompt}]}],
-        "generationConfig": {"temperature": 1, "topK": 40, "topP": 0.95, "maxOutputTokens": 4192},
-        "systemInstruction": {
-            "parts": [
-                {"text": """
+    text = llm.generate(prompt, system="""
 You are Zeus, a macOS automation assistant designed to complete user tasks through precise UI interactions.
 
 YOUR ROLE:
@@ -67,23 +63,13 @@ YOUR ROLE:
 - Your goal is to complete tasks efficiently and thoroughly
 - You maintain detailed state awareness throughout multi-step tasks
 - You break down complex tasks into manageable steps with clear verification points
-"""}
-            ]
-        }
-    }
-    
-    response = requests.post(url, json=request_body)
-    data = response.json()
-    candidates = data.get("candidates", [])
-    text = candidates[0]["content"]["parts"][0]["text"] if candidates else ""
+""")
     
     # Extract JSON steps
-    text = text.replace("```", "").strip()
-    if "{" in text and "}" in text:
-        text = text[text.find("{"):text.rfind("}")+1].strip()
     try:
-        steps_json = json.loads(text, strict=False)
+        steps_json = llm.parse_json(text)
         steps = steps_json["steps"]
+        if steps: plan_cache.store(task, steps)
     except Exception as e:
         print(f"Error parsing steps JSON: {e}")
         steps = []
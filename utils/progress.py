@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+# Discord allows about 5 edits per 5 seconds on a channel; staying well under it
+# leaves room for other replies
+MIN_EDIT_INTERVAL = 1.5
+
+class CoalescingUpdater:
+    """
+    Pushes the latest value through apply (an async function, e.g. a message edit)
+    no more often than every min_interval seconds. Values that arrive faster are
+    coalesced: only the newest is applied, so a burst of iterations costs one edit.
+    update() is safe to call from any thread; flush() applies whatever is pending
+    and waits for it.
+
+        updater = CoalescingUpdater(lambda text: message.edit(content=text)).start()
+        updater.update("step 1")  # from a worker thread
+        await updater.flush()
+    """
+    def __init__(self, apply, min_interval=MIN_EDIT_INTERVAL):
+        self.apply = apply
+        self.min_interval = min_interval
+        self.loop = None
+        self.pending = None
+        self.has_pending = False
+        self.last_applied = 0.0
+        self.wakeup = None
+        self.task = None
+        self.stopping = False
+        self.applied = 0
+
+    def start(self, loop=None):
+        self.loop = loop or asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+        self.task = self.loop.create_task(self._run())
+        return self
+
+    def update(self, value):
+        self.loop.call_soon_threadsafe(self._set, value)
+
+    def _set(self, value):
+        self.pending, self.has_pending = value, True
+        self.wakeup.set()
+
+    async def _apply_pending(self):
+        value, self.pending, self.has_pending = self.pending, None, False
+        try:
+            await self.apply(value)
+        except Exception as e:
+            print(f"⚠️ Progress update failed: {e}")
+        self.last_applied = time.monotonic()
+        self.applied += 1
+
+    async def _run(self):
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            wait = self.last_applied + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait) # later updates replace pending meanwhile
+            if self.has_pending:
+                await self._apply_pending()
+            if self.stopping:
+                return
+
+    async def flush(self):
+        """Applies the last pending value, if any, and stops the updater."""
+        await asyncio.sleep(0) # let updates already scheduled from other threads land
+        self.stopping = True
+        self.wakeup.set()
+        await self.task
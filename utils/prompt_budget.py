@@ -0,0 +1,103 @@
+import os
+
+# Budgets are in estimated tokens (see estimate_tokens). ACTION_BUDGET bounds the
+# "ACTIONS TAKEN SO FAR" section of a prompt.
+ACTION_BUDGET = int(os.environ.get("ZEUS_ACTION_BUDGET", 600))
+RECENT_ACTIONS = int(os.environ.get("ZEUS_RECENT_ACTIONS", 8))
+
+# Room kept for the summary line once older steps start being folded
+SUMMARY_RESERVE = 80
+MAX_LINE_CHARS = 300
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token), good enough for budgeting."""
+    return (len(text) + 3) // 4
+
+def clip(text, limit):
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+def listed(items, limit=4):
+    shown = ", ".join(items[-limit:])
+    return shown if len(items) <= limit else f"{shown} (+{len(items) - limit} more)"
+
+def summarize(records, first_step=1):
+    """Folds records into one line: what kinds of actions ran, on what, and how many failed."""
+    apps, typed, keys = [], [], []
+    clicks = waited = 0
+    failed = [record for record in records if not record["ok"]]
+    for record in records:
+        params = record["params"] if isinstance(record["params"], dict) else {}
+        if record["name"] == "open_app" and params.get("bundle_id") not in apps:
+            apps.append(str(params.get("bundle_id")))
+        elif record["name"] in ("click_element", "click_text", "focus_role"):
+            clicks += 1
+        elif record["name"] in ("type_in_element", "type_into_labeled"):
+            typed.append('"' + clip(str(params.get("text", "")), 30) + '"')
+        elif record["name"] == "fill_and_submit":
+            typed.extend('"' + clip(str(field.get("text", "")), 30) + '"' for field in params.get("fields", []) if isinstance(field, dict))
+        elif record["name"] in ("select_menu_path", "repeat"):
+            clicks += len(record.get("steps") or [])
+        elif record["name"] == "hotkey":
+            combo = "+".join(str(key) for key in params.get("keys", []))
+            if combo not in keys:
+                keys.append(combo)
+        elif record["name"] == "wait":
+            waited += float(params.get("seconds", 0) or 0)
+
+    parts = []
+    if apps:
+        parts.append("opened " + listed(apps))
+    if clicks:
+        parts.append(f"{clicks} click{'s' if clicks != 1 else ''}")
+    if typed:
+        parts.append("typed " + listed(typed))
+    if keys:
+        parts.append("pressed " + listed(keys))
+    if waited:
+        parts.append(f"waited {waited:g}s")
+    if failed:
+        parts.append(f"{len(failed)} failed (last: {clip(failed[-1]['text'], 80)})")
+    last_step = first_step + len(records) - 1
+    return f"Steps {first_step}-{last_step} (summarized): " + ("; ".join(parts) or "no actions") + "\n\n"
+
+class ActionLog:
+    """
+    Structured record of the actions a task has executed. Reads like the list of
+    result lines it replaces (len, iteration, slicing give the lines), and renders the
+    prompt's action section within a token budget: the latest steps verbatim, older
+    ones folded into a single summary line, so the section stays flat on long runs.
+    """
+    def __init__(self):
+        self.records = []
+
+    def add(self, action, text, ok=True, steps=None):
+        """steps: per-sub-step results of a compound action (see utils/compound.py)."""
+        name = next(iter(action), "unknown") if isinstance(action, dict) and action else "unknown"
+        params = action.get(name) if isinstance(action, dict) else None
+        self.records.append({"name": name, "params": params, "ok": ok, "text": text, "steps": steps})
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return (record["text"] for record in self.records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [record["text"] for record in self.records[index]]
+        return self.records[index]["text"]
+
+    def render(self, budget=ACTION_BUDGET, recent=RECENT_ACTIONS):
+        if not self.records:
+            return "none\n\n"
+        kept, used = [], 0
+        for index in range(len(self.records) - 1, -1, -1):
+            line = f"{index + 1}. {clip(self.records[index]['text'], MAX_LINE_CHARS)}\n\n"
+            cost = estimate_tokens(line)
+            if kept and (len(kept) >= recent or used + cost > budget - SUMMARY_RESERVE):
+                break
+            kept.append(line)
+            used += cost
+        folded = len(self.records) - len(kept)
+        summary = summarize(self.records[:folded]) if folded else ""
+        return summary + "".join(reversed(kept))
@@ -0,0 +1,94 @@
+import math
+import os
+import re
+
+# How many clickable elements a prompt lists at most (0 lists everything), and the
+# ceiling widen() grows to after failed turns
+TOP_K = int(os.environ.get("ZEUS_TOP_K", 80))
+MAX_K = int(os.environ.get("ZEUS_MAX_K", 400))
+
+# Query weights: the model's own next goal says most about what it is about to click
+NEXT_GOAL_WEIGHT = 2.0
+TASK_WEIGHT = 1.0
+PLAN_WEIGHT = 0.5
+
+stopwords = {"a", "an", "and", "as", "at", "be", "by", "for", "from", "i", "in", "into", "is", "it", "me",
+             "my", "of", "on", "or", "the", "then", "that", "this", "to", "with", "you", "your", "ax"}
+
+def tokenize(text):
+    """Lowercase word tokens; camelCase (role names like AXTextField) is split first."""
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text or "")
+    return [token for token in re.findall(r"[a-z0-9]+", text.lower()) if token not in stopwords]
+
+def element_tokens(element):
+    return tokenize(element.label) + tokenize(element.role)
+
+def bm25(documents, query, k1=1.2, b=0.75):
+    """
+    Okapi BM25 score of each tokenized document against a {term: weight} query.
+    Scores are relative to this document set, which is one screen.
+    """
+    count = len(documents)
+    if not count:
+        return []
+    average_length = sum(len(document) for document in documents) / count or 1.0
+    frequencies = {}
+    for document in documents:
+        for term in set(document):
+            frequencies[term] = frequencies.get(term, 0) + 1
+    scores = []
+    for document in documents:
+        counts = {}
+        for term in document:
+            counts[term] = counts.get(term, 0) + 1
+        score = 0.0
+        for term, weight in query.items():
+            tf = counts.get(term)
+            if not tf:
+                continue
+            idf = math.log(1 + (count - frequencies[term] + 0.5) / (frequencies[term] + 0.5))
+            score += weight * idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(document) / average_length))
+        scores.append(score)
+    return scores
+
+def build_query(task="", plan_steps=(), next_goal=""):
+    query = {}
+    for text, weight in [(task, TASK_WEIGHT), (next_goal, NEXT_GOAL_WEIGHT)] + [(step, PLAN_WEIGHT) for step in plan_steps]:
+        for term in set(tokenize(text)):
+            query[term] = query.get(term, 0.0) + weight
+    return query
+
+class ElementRanker:
+    """
+    Picks which clickable elements a prompt lists. Screens with more than k elements
+    are cut down to the k that score best against the task, plan and next goal; the
+    remaining slots go to unmatched elements in screen order, so sparse queries still
+    show the top of the window. The result is in clickable-id order. widen() doubles
+    k for a retry after a failed turn; k returns to its default when the app changes.
+    """
+    def __init__(self, top_k=TOP_K, max_k=MAX_K):
+        self.top_k = top_k
+        self.max_k = max(max_k, top_k)
+        self.k = top_k
+        self.app = None
+
+    def widen(self):
+        if self.k:
+            self.k = min(self.k * 2, self.max_k)
+        return self.k
+
+    def reset(self):
+        self.k = self.top_k
+
+    def select(self, snapshot, task="", plan_steps=(), next_goal=""):
+        """Returns (elements, omitted_count)."""
+        if snapshot.bundle_id != self.app:
+            self.app = snapshot.bundle_id
+            self.reset()
+        elements = snapshot.clickable()
+        if not self.k or len(elements) <= self.k:
+            return elements, 0
+        scores = bm25([element_tokens(element) for element in elements], build_query(task, plan_steps, next_goal))
+        order = sorted(range(len(elements)), key=lambda index: (-scores[index], index))
+        kept = sorted(order[:self.k])
+        return [elements[index] for index in kept], len(elements) - len(kept)
@@ -0,0 +1,226 @@
+import hashlib
+import difflib
+import string
+import re
+import os
+from utils.cache import DiskLRU
+
+# Fuzzy app-name matches below this are left to the LLM ("open sfari" is fine, "open mail and reply" isn't)
+MATCH_RATIO = 0.85
+APP_DIRS = ['/Applications', os.path.expanduser('~/Applications'), '/System/Applications']
+
+# Installed apps, keyed by a digest of the app directories' listings: get_apps asks
+# mdls for every bundle, which takes seconds, so it is only re-run after installs
+app_lists = DiskLRU("apps.json", max_entries=4)
+
+# Names people use that neither the app name nor its bundle id give away
+ALIASES = {
+    "vscode": "com.microsoft.VSCode",
+    "vs code": "com.microsoft.VSCode",
+    "code": "com.microsoft.VSCode",
+    "settings": "com.apple.systempreferences",
+    "system preferences": "com.apple.systempreferences",
+    "preferences": "com.apple.systempreferences",
+    "chrome": "com.google.Chrome",
+    "word": "com.microsoft.Word",
+    "excel": "com.microsoft.Excel",
+    "powerpoint": "com.microsoft.Powerpoint",
+    "teams": "com.microsoft.teams2",
+    "itunes": "com.apple.Music",
+    "apple music": "com.apple.Music",
+    "imessage": "com.apple.MobileSMS",
+    "texts": "com.apple.MobileSMS",
+    "the terminal": "com.apple.Terminal",
+}
+# Vendor words dropped to get the short name people say ("Google Chrome" -> "chrome")
+VENDORS = ("apple ", "google ", "microsoft ", "adobe ", "mozilla ")
+
+KEY_ALIASES = {
+    "command": "cmd", "⌘": "cmd", "control": "ctrl", "ctl": "ctrl", "option": "alt", "opt": "alt", "⌥": "alt",
+    "⇧": "shift", "return": "enter", "escape": "esc", "spacebar": "space", "backspace": "delete", "del": "delete",
+    "arrow up": "up", "arrow down": "down", "arrow left": "left", "arrow right": "right",
+    "page up": "pageup", "page down": "pagedown",
+}
+MODIFIERS = {"cmd", "ctrl", "alt", "shift", "fn"}
+KEYS = MODIFIERS | {"enter", "tab", "esc", "space", "delete", "up", "down", "left", "right", "home", "end",
+                    "pageup", "pagedown"} | {f"f{number}" for number in range(1, 13)} | set(string.ascii_lowercase) | set(string.digits)
+
+_polite = r"(?:(?:please|can you|could you|hey zeus|zeus)[\s,]+)*"
+_the = r"(?:the\s+)?"
+_app = r"(?P<app>[\w .&'+-]+?)"
+_tail = r"(?:\s+app(?:lication)?)?(?:\s+for me)?(?:\s+please)?\s*[.!]?"
+PATTERNS = [
+    ("open", re.compile(rf"^{_polite}(?:open|launch|start|run)\s+(?:up\s+)?{_the}{_app}{_tail}$", re.I)),
+    ("switch", re.compile(rf"^{_polite}(?:(?:switch|go|change|flip)\s+(?:back\s+|over\s+)?to|focus(?:\s+on)?|activate|bring\s+up)\s+{_the}{_app}{_tail}$", re.I)),
+    ("quit", re.compile(rf"^{_polite}(?:quit|close|exit|kill)\s+(?:out\s+of\s+)?{_the}{_app}{_tail}$", re.I)),
+    ("hotkey", re.compile(rf"^{_polite}(?:press|hit|use\s+(?:the\s+)?shortcut)\s+(?P<keys>[\w⌘⌥⇧ +-]+?)(?:\s+key)?(?:\s+please)?\s*[.!]?$", re.I)),
+    ("type", re.compile(rf"^{_polite}type\s+(?P<quote>[\"'“‘]?)(?P<text>.+?)(?:[\"'”’])?(?:\s+please)?\s*$", re.I)),
+]
+TEXT_ROLES = {"AXTextField", "AXTextArea", "AXSearchField", "AXComboBox"}
+
+def normalize(name):
+    return " ".join(name.lower().replace(".app", "").translate(str.maketrans("", "", ".,!?\"'")).split())
+
+def app_dirs_digest():
+    listing = []
+    for directory in APP_DIRS:
+        try:
+            listing.append(f"{directory}:{os.stat(directory).st_mtime_ns}:{'|'.join(sorted(os.listdir(directory)))}")
+        except OSError:
+            pass
+    return hashlib.sha256("\n".join(listing).encode()).hexdigest()[:16]
+
+def installed_apps():
+    """(name, bundle_id) for every installed app, from utils/__applist__.get_apps, cached on disk."""
+    key = app_dirs_digest()
+    apps = app_lists.get(key)
+    if apps is None:
+        from utils.__applist__ import get_apps
+        apps = [[name, bundle_id] for name, bundle_id, _ in get_apps() if bundle_id != "Unknown"]
+        app_lists.put(key, apps)
+    return [tuple(app) for app in apps]
+
+class AppIndex:
+    """Spoken app names to bundle ids: app names, their short forms, bundle-id tails and ALIASES."""
+    def __init__(self, apps=(), running=()):
+        self.names = {}
+        self.running = {bundle_id for _, bundle_id in running}
+        bundles = {bundle_id.lower(): bundle_id for _, bundle_id in list(apps) + list(running)}
+        for name, bundle_id in list(apps) + list(running):
+            self.add(normalize(name), bundle_id)
+            for vendor in VENDORS:
+                if normalize(name).startswith(vendor):
+                    self.add(normalize(name)[len(vendor):], bundle_id)
+            self.add(normalize(bundle_id.rsplit(".", 1)[-1]), bundle_id)
+        for alias, bundle_id in ALIASES.items():
+            if bundle_id.lower() in bundles:
+                self.names[alias] = {bundles[bundle_id.lower()]}
+
+    def add(self, name, bundle_id):
+        if name:
+            self.names.setdefault(name, set()).add(bundle_id)
+
+    def lookup(self, name):
+        """The bundle id name most likely means, or None unless it is unambiguous."""
+        name = normalize(name)
+        candidates = self.names.get(name)
+        if candidates is None:
+            close = difflib.get_close_matches(name, self.names, n=2, cutoff=MATCH_RATIO)
+            # a close match counts only when nothing else is nearly as close
+            if not close or (len(close) > 1 and self.names[close[0]] != self.names[close[1]]):
+                return None
+            candidates = self.names[close[0]]
+        if len(candidates) > 1:
+            # e.g. two "Notes": the running one is the one the user sees
+            candidates = candidates & self.running
+        return next(iter(candidates)) if len(candidates) == 1 else None
+
+def parse_keys(spoken):
+    """'cmd+shift+t', 'command shift t', 'enter' -> ['cmd', 'shift', 't'], or None if any part isn't a key."""
+    spoken = spoken.lower().strip()
+    for alias in sorted(KEY_ALIASES, key=len, reverse=True):
+        spoken = re.sub(rf"(?<![\w]){re.escape(alias)}(?![\w])", KEY_ALIASES[alias], spoken)
+    keys = [key for key in re.split(r"\s*(?:\+|-|\s|\band\b)\s*", spoken) if key]
+    if not keys or any(key not in KEYS for key in keys):
+        return None
+    if len(keys) > 1 and not all(key in MODIFIERS for key in keys[:-1]):
+        return None # "press a b" isn't a shortcut
+    return keys
+
+class Route:
+    """A command resolved locally: the actions to run, in the agent's action format."""
+    def __init__(self, intent, actions, summary):
+        self.intent = intent
+        self.actions = actions
+        self.summary = summary
+
+    def __repr__(self):
+        return f"Route({self.intent}, {self.actions})"
+
+class Router:
+    """
+    Fast path for commands simple enough to need no model: opening, switching to
+    and quitting apps, shortcuts, and typing into the only text field on screen.
+    route() returns None whenever it isn't sure, and the command goes to the LLM.
+    running and snapshot are callables, so the running-app list and the DOM are
+    only fetched by the intents that need them.
+    """
+    def __init__(self, apps=None):
+        self.apps = apps
+        self.index = None
+
+    def app_index(self, running=()):
+        if self.apps is None:
+            self.apps = installed_apps()
+        if self.index is None or running:
+            self.index = AppIndex(self.apps, running)
+        return self.index
+
+    def route(self, command, running=None, snapshot=None):
+        command = command.strip()
+        for intent, pattern in PATTERNS:
+            match = pattern.match(command)
+            if match:
+                return getattr(self, f"route_{intent}")(match, running, snapshot)
+        return None
+
+    def find_app(self, name, running):
+        bundle_id = self.app_index().lookup(name)
+        if bundle_id is None and running is not None:
+            # not installed in the usual places, but maybe running
+            bundle_id = self.app_index(running()).lookup(name)
+        return bundle_id
+
+    def route_open(self, match, running, snapshot):
+        bundle_id = self.find_app(match["app"], running)
+        if bundle_id is None:
+            return None
+        return Route("open", [{"open_app": {"bundle_id": bundle_id}}, {"finish": {}}], f"Opened {match['app']}")
+
+    def route_switch(self, match, running, snapshot):
+        route = self.route_open(match, running, snapshot)
+        if route is not None:
+            route.intent, route.summary = "switch", f"Switched to {match['app']}"
+        return route
+
+    def route_quit(self, match, running, snapshot):
+        if running is None:
+            return None
+        apps = running()
+        bundle_id = self.app_index(apps).lookup(match["app"])
+        if bundle_id is None:
+            return None
+        if bundle_id not in {running_id for _, running_id in apps}:
+            return Route("quit", [{"finish": {}}], f"{match['app']} isn't running")
+        # bring it to the front first so cmd+q reaches it
+        return Route("quit", [{"open_app": {"bundle_id": bundle_id}}, {"hotkey": {"keys": ["cmd", "q"]}}, {"finish": {}}], f"Quit {match['app']}")
+
+    def route_hotkey(self, match, running, snapshot):
+        keys = parse_keys(match["keys"])
+        if keys is None:
+            return None
+        return Route("hotkey", [{"hotkey": {"keys": keys}}, {"finish": {}}], f"Pressed {'+'.join(keys)}")
+
+    def route_type(self, match, running, snapshot):
+        text = match["text"].strip()
+        # "type hello into the search field" names a target; that's for the LLM
+        if snapshot is None or not text or (not match["quote"] and re.search(r"\s(?:in|into|on)\s", text)):
+            return None
+        fields = [element for element in snapshot().clickable() if element.role in TEXT_ROLES]
+        if len(fields) != 1:
+            return None
+        return Route("type", [{"type_in_element": {"id": fields[0].clickable_id, "text": text}}, {"finish": {}}], f"Typed {text}")
+
+_router = None
+
+def get_router():
+    global _router
+    if _router is None:
+        _router = Router()
+    return _router
+
+def route(command, running=None, snapshot=None):
+    """Router().route with a shared, lazily built app index (ZEUS_ROUTER=0 turns the fast path off)."""
+    if os.environ.get("ZEUS_ROUTER", "1") == "0":
+        return None
+    return get_router().route(command, running, snapshot)
@@ -0,0 +1,62 @@
+import json
+import os
+import time
+import utils.tracing as tracing
+
+# How long the UI must hold still after each kind of action (quiet), the most we wait
+# for that (timeout), and whether the screen has to change first (require_change).
+# ZEUS_SETTLE takes JSON overrides, e.g. '{"click": {"quiet": 0.3}}'.
+policies = {
+    "open_app": {"quiet": 0.3, "timeout": 6.0, "require_change": True},
+    "click": {"quiet": 0.15, "timeout": 1.5, "require_change": False},
+    "paste": {"quiet": 0.05, "timeout": 0.5, "require_change": True},
+    "type": {"quiet": 0.1, "timeout": 1.0, "require_change": False},
+    "hotkey": {"quiet": 0.15, "timeout": 1.5, "require_change": False},
+    "wait": {"quiet": 1.0, "timeout": 5.0, "require_change": True},
+}
+POLL_INTERVAL = float(os.environ.get("ZEUS_SETTLE_POLL", 0.05))
+
+try:
+    for kind, overrides in json.loads(os.environ.get("ZEUS_SETTLE", "{}")).items():
+        policies[kind] = dict(policies.get(kind, policies["click"]), **overrides)
+except ValueError as e:
+    print(f"Ignoring invalid ZEUS_SETTLE: {e}")
+
+def policy(kind, **overrides):
+    return dict(policies.get(kind, policies["click"]), **{key: value for key, value in overrides.items() if value is not None})
+
+def wait_for_settle(probe, kind, before=None, ready=None, **overrides):
+    """
+    Polls probe() (a cheap fingerprint of the screen) until it returns the same value
+    for the policy's quiet window. With require_change the window only starts once
+    the value differs from before; ready, if given, must also accept the value.
+    Returns True once settled, False when the timeout is hit first.
+    """
+    rule = policy(kind, **overrides)
+    start = time.perf_counter()
+    deadline = start + rule["timeout"]
+    with tracing.span("settle", kind=kind) as settle_span:
+        def accepted(value):
+            return (not rule["require_change"] or before is None or value != before) and (ready is None or ready(value))
+        last = probe()
+        polls = 1
+        stable_since = time.perf_counter() if accepted(last) else None
+        settled = False
+        while True:
+            now = time.perf_counter()
+            if stable_since is not None and now - stable_since >= rule["quiet"]:
+                settled = True
+                break
+            if now >= deadline:
+                break
+            time.sleep(min(POLL_INTERVAL, max(0.0, deadline - now)))
+            current = probe()
+            polls += 1
+            if current != last or stable_since is None:
+                last = current
+                stable_since = time.perf_counter() if accepted(current) else None
+        settle_span.set("settled", settled)
+        settle_span.set("polls", polls)
+    if not settled and kind != "wait":
+        print(f"⏳ UI still changing after {rule['timeout']}s ({kind}), continuing")
+    return settled
@@ -0,0 +1,213 @@
+import json
+import time
+from typing import List
+from utils.dom import DOMSnapshot, Element
+from utils.executor import ExecutorBackend
+
+# swift/DOM.swift counts an element as clickable when its role is in
+# alwaysClickableTags or it exposes AXPress, AXPick or AXConfirm. Scenarios don't
+# list AX actions, so the roles that expose AXPress in practice stand in for them;
+# a spec's "clickable" key overrides both.
+always_clickable_roles = {"AXButton", "AXLink", "AXTextField", "AXTextArea", "AXCell"}
+pressable_roles = {"AXCheckBox", "AXRadioButton", "AXPopUpButton", "AXMenuButton", "AXTab"}
+
+# Roughly what the real backend spends on each action: the app's own response plus
+# the settle detector's quiet window (utils/settle.py)
+default_latency = {"launch": 1.5, "activate": 0.35, "click": 0.2, "type": 0.15, "hotkey": 0.15, "snapshot": 0.0}
+
+def normalize_keys(keys):
+    names = {"command": "cmd", "control": "ctrl", "option": "alt", "return": "enter"}
+    return "+".join(names.get(str(key).lower(), str(key).lower()) for key in keys)
+
+class SimulatedBackend(ExecutorBackend):
+    """
+    Scriptable in-memory stand-in for the macOS UI. A scenario describes apps, their
+    screens as element trees, and transitions:
+
+        {
+          "running": ["com.apple.finder"],
+          "apps": {
+            "com.apple.Notes": {
+              "name": "Notes",
+              "start": "list",
+              "screens": {
+                "list": {
+                  "elements": [{"role": "AXButton", "title": "New Note", "on_click": "editor"}],
+                  "hotkeys": {"cmd+n": "editor"},
+                  "menus": {"File > New Note": "editor"}
+                },
+                "editor": {"elements": [{"role": "AXTextArea", "key": "body", "on_type": "editor"}]}
+              }
+            }
+          }
+        }
+
+    Elements may nest through "children". on_click / on_type / hotkeys / menus (keyed
+    by "File > New Note" paths) name a screen of the same app, or {"app": bundle_id,
+    "screen": name}. Typed text is kept per element "key" (or title) and shown as
+    the element's value. Latencies mirror the
+    real backend; time_scale=0 skips the sleeps and only adds them up in
+    simulated_seconds, so the agent loop's own overhead can be measured on its own.
+    """
+    def __init__(self, scenario, time_scale=0.0, latency=None):
+        self.scenario = scenario
+        self.time_scale = time_scale
+        self.latency = dict(default_latency, **scenario.get("latency", {}), **(latency or {}))
+        self.reset()
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        with open(path, "r") as f:
+            return cls(json.load(f), **kwargs)
+
+    def reset(self):
+        self.frontmost = self.scenario.get("frontmost")
+        self.running = list(self.scenario.get("running", []))
+        if self.frontmost and self.frontmost not in self.running:
+            self.running.append(self.frontmost)
+        self.screens = {bundle_id: app.get("start") for bundle_id, app in self.scenario["apps"].items()}
+        self.values = {}
+        self.events = []
+        self.simulated_seconds = 0.0
+        self.current = None # last snapshot, so clicks resolve against what the agent saw
+        self._specs = {}
+
+    def _spend(self, kind, seconds=None):
+        seconds = self.latency.get(kind, 0.0) if seconds is None else seconds
+        self.simulated_seconds += seconds
+        if self.time_scale and seconds:
+            time.sleep(seconds * self.time_scale)
+
+    def _transition(self, target):
+        if not target:
+            return
+        if isinstance(target, dict):
+            bundle_id = target.get("app", self.frontmost)
+            if bundle_id not in self.running:
+                self.running.append(bundle_id)
+            self.frontmost = bundle_id
+            if target.get("screen"):
+                self.screens[bundle_id] = target["screen"]
+        else:
+            self.screens[self.frontmost] = target
+
+    def _screen(self):
+        app = self.scenario["apps"].get(self.frontmost)
+        if not app:
+            return None, {}
+        return app, app.get("screens", {}).get(self.screens.get(self.frontmost), {})
+
+    def _value_key(self, spec):
+        return (self.frontmost, spec.get("key") or spec.get("title") or spec.get("description"))
+
+    def _find(self, element_id):
+        """Returns the scenario spec behind a clickable id of the current snapshot."""
+        snapshot = self.current or self.get_snapshot(spend=False)
+        element = snapshot.element(element_id)
+        return None if element is None else self._specs.get(element.id)
+
+    # action 1
+    def open_app(self, bundle_id: str) -> bool:
+        if bundle_id not in self.scenario["apps"]:
+            print(f"❌ Error: Application not found: {bundle_id}")
+            return False
+        self._spend("activate" if bundle_id in self.running else "launch")
+        if bundle_id not in self.running:
+            self.running.append(bundle_id)
+        self.frontmost = bundle_id
+        self.events.append(("open_app", bundle_id))
+        return True
+    # action 2
+    def click_element(self, element_id: int) -> bool:
+        spec = self._find(element_id)
+        if spec is None:
+            print(f"❌ Error: Clickable element not found: {element_id}")
+            return False
+        self._spend("click")
+        self.events.append(("click", spec.get("title") or spec.get("key") or spec.get("role")))
+        self._transition(spec.get("on_click"))
+        return True
+    # action 3
+    def type_in_element(self, element_id: int, text: str) -> bool:
+        spec = self._find(element_id)
+        if spec is None:
+            print(f"❌ Error: Clickable element not found: {element_id}")
+            return False
+        self._spend("click")
+        self._spend("type")
+        self.values[self._value_key(spec)] = text
+        self.events.append(("type", spec.get("key") or spec.get("title"), text))
+        self._transition(spec.get("on_type"))
+        return True
+    # action 4
+    def hotkey(self, keys: List[str]) -> bool:
+        self._spend("hotkey")
+        combo = normalize_keys(keys)
+        self.events.append(("hotkey", combo))
+        _, screen = self._screen()
+        self._transition(screen.get("hotkeys", {}).get(combo))
+        return True
+    # action 5
+    def wait(self, seconds: float) -> bool:
+        self._spend("wait", seconds)
+        return True
+    def select_menu_path(self, path: List[str]) -> bool:
+        _, screen = self._screen()
+        # titles match the way swift/Executor.swift matches them: any case, ellipsis optional
+        menus = {key.lower(): target for key, target in screen.get("menus", {}).items()}
+        trail = " > ".join(str(title).strip().rstrip("….") for title in path)
+        if trail.lower() not in menus:
+            print(f"❌ Error: Menu item not found: {trail}")
+            return False
+        self._spend("click")
+        self.events.append(("menu", trail))
+        self._transition(menus[trail.lower()])
+        return True
+
+    def get_snapshot(self, spend=True) -> DOMSnapshot:
+        if spend:
+            self._spend("snapshot")
+        app, screen = self._screen()
+        elements = []
+        self._specs = {}
+        next_clickable_id = 1
+
+        def add(spec, parent):
+            nonlocal next_clickable_id
+            element_id = len(elements) + 1
+            clickable = spec.get("clickable", spec.get("role") in always_clickable_roles | pressable_roles)
+            value = self.values.get(self._value_key(spec), spec.get("value", ""))
+            elements.append(Element(
+                id=element_id,
+                role=spec.get("role", "AXGroup"),
+                clickable_id=next_clickable_id if clickable else None,
+                title=spec.get("title", ""),
+                description=spec.get("description", ""),
+                value=value,
+                placeholder=spec.get("placeholder", ""),
+                text=spec.get("text", ""),
+                bounds=(0.0, 24.0 * element_id, 240.0, 22.0),
+                parent=parent,
+            ))
+            self._specs[element_id] = spec
+            if clickable:
+                next_clickable_id += 1
+            for child in spec.get("children", []):
+                add(child, element_id)
+
+        if app:
+            window = {"role": "AXWindow", "title": app.get("name", ""), "children": screen.get("elements", [])}
+            add(window, None)
+        apps = [(self.scenario["apps"].get(bundle_id, {}).get("name", bundle_id), bundle_id) for bundle_id in self.running]
+        name = app.get("name", self.frontmost) if app else "Finder"
+        snapshot = DOMSnapshot(name, self.frontmost or "com.apple.finder", elements, apps)
+        self.current = snapshot
+        return snapshot
+
+    def state(self):
+        """Frontmost app, its screen and the typed values, for checking a run's outcome."""
+        return {
+            "frontmost": self.frontmost,
+            "screen": self.screens.get(self.frontmost),
+            "values": {f"{bundle_id}:{key}": value for (bundle_id, key), value in self.values.items()},
+        }
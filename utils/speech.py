@@ -1,97 +1,195 @@
-import numpy as np
-import torch
-import queue
 import threading
 import time
-import pyaudio
-from faster_whisper import WhisperModel
-from agent import run 
-import string
+import os
+from utils.audio import Capture, RingBuffer, VAD, to_float
+from utils.wakeword import WakeWordDetector, strip_phrase
 
-model = WhisperModel("small", device="cuda" if torch.cuda.is_available() else "cpu", compute_type="float32")
-
-
-FORMAT = pyaudio.paInt16
-CHANNELS = 1
 RATE = 16000
 CHUNK = 1024
-SILENCE_TIME = 2  # how long it waits to process a command
-
-audio_queue = queue.Queue()
-
-last_command = None  
-
-def audio_callback(in_data, frame_count, time_info, status):
-    """Callback function to receive audio data."""
-    audio_queue.put(in_data)
-    return (in_data, pyaudio.paContinue)
+COMMAND_SILENCE_MS = int(os.environ.get("ZEUS_COMMAND_SILENCE_MS", 700))  # silence that ends a command
+WAKE_MODEL = os.environ.get("ZEUS_WAKE_MODEL", "tiny.en")
+COMMAND_MODEL = os.environ.get("ZEUS_WHISPER_MODEL", "small")
+# float32, int8 (quantized, much lighter on CPU), float16 (GPU), or auto: int8 on CPU, float16 on CUDA
+COMPUTE_TYPE = os.environ.get("ZEUS_WHISPER_COMPUTE", "float32")
+
+# torch and faster_whisper are imported on first use: loading them (and the
+# models) takes seconds, which text-only callers shouldn't pay for
+_models = {}
+_model_lock = threading.Lock()
+
+def get_model(size=COMMAND_MODEL, compute_type=COMPUTE_TYPE):
+    """A Whisper model, loaded on first use and kept for the next one."""
+    with _model_lock:
+        if (size, compute_type) not in _models:
+            import torch
+            from faster_whisper import WhisperModel
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            resolved = compute_type if compute_type != "auto" else ("float16" if device == "cuda" else "int8")
+            _models[(size, compute_type)] = WhisperModel(size, device=device, compute_type=resolved)
+        return _models[(size, compute_type)]
+
+def release_model(size=COMMAND_MODEL, compute_type=COMPUTE_TYPE):
+    """Drops a loaded model so its memory can be reclaimed; the next get_model reloads it."""
+    with _model_lock:
+        return _models.pop((size, compute_type), None) is not None
+
+class ResidentModel:
+    """
+    Stands in for a Whisper model under a residency policy: loaded on the first
+    transcribe() and, with idle_seconds set, released by release_if_idle() once
+    unused for that long. idle_seconds=None keeps it warm.
+    """
+    def __init__(self, size=COMMAND_MODEL, compute_type=COMPUTE_TYPE, idle_seconds=None):
+        self.size = size
+        self.compute_type = compute_type
+        self.idle_seconds = idle_seconds
+        self.last_used = None
+
+    def load(self):
+        model = get_model(self.size, self.compute_type)
+        self.last_used = time.monotonic()
+        return model
+
+    def transcribe(self, audio, **kwargs):
+        return self.load().transcribe(audio, **kwargs)
+
+    def release_if_idle(self):
+        if self.idle_seconds is None or self.last_used is None:
+            return False
+        if time.monotonic() - self.last_used < self.idle_seconds:
+            return False
+        self.last_used = None
+        if release_model(self.size, self.compute_type):
+            print(f"💤 Unloaded Whisper {self.size} after {self.idle_seconds / 60:g} min idle")
+            return True
+        return False
+
+last_command = None
+
+class CommandRecognizer:
+    """
+    Two-stage listening over one chunk source (a Capture, or an ArraySource for
+    recorded audio):
+
+    1. While the VAD hears speech, a WakeWordDetector runs the small wake model on
+       rolling windows. Ambient speech never gets further than this.
+    2. After the wake phrase, audio is kept until COMMAND_SILENCE_MS of silence and
+       only that part is transcribed with the full model; segments go to
+       on_partial as they are decoded.
+
+    The wake phrase and the command may come in one breath or with a pause between
+    them (up to command_timeout seconds).
+    """
+    def __init__(self, source, wake_model, command_model, on_partial=None, rate=RATE,
+                 command_silence_ms=COMMAND_SILENCE_MS, command_timeout=5.0, max_command_seconds=20, ring_seconds=30):
+        self.source = source
+        self.command_model = command_model
+        self.on_partial = on_partial
+        self.rate = rate
+        self.detector = WakeWordDetector(wake_model, rate=rate)
+        self.ring = RingBuffer(rate * ring_seconds)
+        self.vad = VAD(rate=rate, hangover_ms=300)
+        self.command_silence_ms = command_silence_ms
+        self.command_timeout = int(command_timeout * rate)
+        self.max_command = int(max_command_seconds * rate)
+        self.listen()
+
+    def listen(self):
+        """Back to stage 1."""
+        self.command_start = None
+        self.last_voice = None
+        self.speech_start = None
+        self.detector.reset()
+        self.vad.set_hangover(300) # short, so the wake model also gets the tail of an utterance promptly
+
+    def feed(self, chunk):
+        """Adds a chunk; returns the transcribed command once one is complete."""
+        self.ring.extend(chunk)
+        events = self.vad.process(chunk)
+        position = self.ring.total
+        for event, event_position in events:
+            if event == "start" and self.speech_start is None:
+                self.speech_start = event_position
+        if self.command_start is None:
+            ends = [event_position for event, event_position in events if event == "end"]
+            if (self.vad.speaking and self.detector.due(position)) or ends:
+                wake_end = self.detector.check(self.ring, position, start=self.speech_start or 0, final=bool(ends) and not self.vad.speaking)
+                if wake_end is not None:
+                    print("👂 Wake phrase detected")
+                    self.command_start = wake_end
+                    self.last_voice = position if self.vad.speaking else max([wake_end] + ends)
+                    self.vad.set_hangover(self.command_silence_ms)
+                    return self.finish(position)
+            if ends and not self.vad.speaking:
+                self.speech_start = None
+                self.detector.reset()
+            return None
+        # stage 2: wait for the command to end
+        if self.vad.speaking:
+            self.last_voice = position
+        for event, event_position in events:
+            if event == "end":
+                self.last_voice = event_position
+        return self.finish(position)
+
+    def finish(self, position):
+        """Transcribes the command once it has been followed by enough silence."""
+        silent_for = 0 if self.vad.speaking else position - self.last_voice
+        if self.last_voice - self.command_start >= self.rate // 4 and silent_for * 1000 >= self.command_silence_ms * self.rate:
+            return self.transcribe(self.command_start, self.last_voice)
+        if silent_for > self.command_timeout:
+            print("🔇 Wake phrase heard but no command followed.")
+            self.listen()
+        elif position - self.command_start >= self.max_command:
+            return self.transcribe(self.command_start, position)
+        return None
 
-def is_silent(audio_buffer, threshold=300):
-    """Detects if audio contains only silence based on amplitude threshold."""
-    audio_np = np.frombuffer(audio_buffer, dtype=np.int16)
-    return np.abs(audio_np).mean() < threshold 
+    def transcribe(self, start, end):
+        print("⏳ Command finished, transcribing...")
+        samples = self.ring.get(start, end)
+        segments, _ = self.command_model.transcribe(to_float(samples), language="en", beam_size=5)
+        parts = []
+        for segment in segments: # decoded lazily, so partial text is available early
+            parts.append(segment.text.strip())
+            if self.on_partial:
+                self.on_partial(" ".join(parts))
+        self.listen()
+        text = " ".join(parts).strip(" ,.!?")
+        # in case the wake window ended before the phrase did
+        return (strip_phrase(text) or text) if text else ""
+
+    def next_command(self, stop=None, poll=0.5):
+        """Blocks until a command is recognized. None once the source is exhausted or stop is set."""
+        while not (stop and stop.is_set()):
+            chunk = self.source.read(timeout=poll)
+            if chunk is None:
+                if getattr(self.source, "exhausted", False):
+                    return None
+                continue
+            command = self.feed(chunk)
+            if command:
+                return command
+        return None
 
-def get_speech_command():
+def get_speech_command(on_partial=None):
     """Listens for a single speech command, transcribes it, and returns the extracted text."""
     print("🎤 Listening for 'Hey Zeus'...")
 
-    p = pyaudio.PyAudio()
-    stream = p.open(format=FORMAT, channels=CHANNELS, rate=RATE, input=True,
-                    frames_per_buffer=CHUNK, stream_callback=audio_callback)
-    stream.start_stream()
-
-    audio_buffer = b""
-    last_speech_time = None
+    wake_model, command_model = get_model(WAKE_MODEL), get_model()
+    capture = Capture(rate=RATE, chunk=CHUNK).start()
+    recognizer = CommandRecognizer(capture, wake_model, command_model, on_partial=on_partial or (lambda text: print(f"📝 {text}")))
 
     try:
-        while True:
-            while not audio_queue.empty():
-                audio_chunk = audio_queue.get()
-                audio_buffer += audio_chunk
-
-                if not is_silent(audio_chunk):  
-                    last_speech_time = time.time() 
-
-            if last_speech_time and time.time() - last_speech_time > SILENCE_TIME:
-                break #only process when we talk and stop
-
-        if not audio_buffer:  # no talking
-            print("🔇 No speech detected.")
-            return None
-
-        print("⏳ Silence detected, processing speech...")
-
-        audio_np = np.frombuffer(audio_buffer, dtype=np.int16).astype(np.float32) / 32768.0
-        segments, _ = model.transcribe(audio_np, language="en", beam_size=5)
-        full_transcript = " ".join(segment.text.strip() for segment in segments).strip()
-
-        if not full_transcript:
-            print("🔇 No speech detected.")
-            return None
-
-        print(f"🗣️ Detected speech: {full_transcript}")
-
-        trigger_phrases = ["hey zeus", "hey seuss", "hello zeus", "ay flow"]
-        command = None
-
-        for phrase in trigger_phrases:
-            index = full_transcript.lower().translate(str.maketrans("", "", string.punctuation)).find(phrase.lower())
-            if index != -1:
-                command = full_transcript[index + len(phrase):].strip()
-                break
-
+        command = recognizer.next_command() # blocks on the capture queue instead of spinning
         if command:
             print(f"➡️ Running command: {command}")
             return command
-        else:
-            print("🔇 speech detected but no valid command extracted.")
-            return None
+        print("🔇 No command detected.")
+        return None
 
     except Exception as e:
         print(f"❌ Error in speech processing: {e}")
         return None
 
     finally:
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
\ No newline at end of file
+        capture.stop()
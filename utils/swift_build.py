@@ -0,0 +1,125 @@
+import subprocess
+import hashlib
+import fcntl
+import shlex
+import shutil
+import glob
+import sys
+import os
+from utils.cache import cache_dir, DiskLRU
+
+# Compiler and signer commands; point them at stubs to exercise the cache without a
+# Swift toolchain, e.g. ZEUS_SWIFTC="python stub_swiftc.py" ZEUS_CODESIGN=true
+SWIFTC = os.environ.get("ZEUS_SWIFTC", "swiftc")
+CODESIGN = os.environ.get("ZEUS_CODESIGN", "codesign")
+SWIFT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "swift")
+KEEP_BUILDS = 3
+
+# `swiftc --version` per compiler binary (path + mtime), so a warm start doesn't spawn it
+toolchains = DiskLRU("toolchains.json", max_entries=8)
+
+def build_dir():
+    path = os.path.join(cache_dir(), "swift")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def sources(swift_dir=SWIFT_DIR):
+    return sorted(glob.glob(os.path.join(swift_dir, "*.swift")))
+
+def _output(command):
+    try:
+        return subprocess.run(command, capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+def toolchain_stamp(compiler=SWIFTC):
+    """
+    Identifies the compiler swiftc actually runs. /usr/bin/swiftc is an xcrun shim
+    whose mtime doesn't move when Xcode is updated or switched, so the stamp also
+    covers DEVELOPER_DIR, xcode-select's choice and the binary xcrun resolves to.
+    """
+    command = shlex.split(compiler)
+    binary = shutil.which(command[0]) or command[0]
+    resolved = _output(["xcrun", "--find", os.path.basename(command[0])]) if shutil.which("xcrun") else ""
+    developer_dir = _output(["xcode-select", "-p"]) if shutil.which("xcode-select") else ""
+    try:
+        parts = [compiler, os.path.realpath(binary), str(os.stat(binary).st_mtime_ns),
+                 os.environ.get("DEVELOPER_DIR", ""), developer_dir]
+        if resolved:
+            parts += [os.path.realpath(resolved), str(os.stat(resolved).st_mtime_ns)]
+    except OSError:
+        return None
+    return "|".join(parts)
+
+def toolchain_version(compiler=SWIFTC):
+    command = shlex.split(compiler)
+    stamp = toolchain_stamp(compiler)
+    version = toolchains.get(stamp) if stamp else None
+    if version is None:
+        version = subprocess.run(command + ["--version"], capture_output=True, text=True, check=True).stdout.strip()
+        if stamp:
+            toolchains.put(stamp, version)
+    return version
+
+def build_key(source_files, entitlements, version):
+    """sha256 over the sources, the entitlements and the toolchain version."""
+    digest = hashlib.sha256()
+    for path in list(source_files) + [entitlements]:
+        digest.update(os.path.basename(path).encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            digest.update(f.read())
+        digest.update(b"\0")
+    digest.update(version.encode("utf-8"))
+    return digest.hexdigest()
+
+def prune(directory, keep):
+    builds = sorted(glob.glob(os.path.join(directory, "libexecutor-*.dylib")), key=os.path.getmtime)
+    for path in builds[:max(0, len(builds) - keep)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def library_path(swift_dir=SWIFT_DIR, force=False):
+    """
+    Returns the signed libexecutor for the current sources, compiling it only when no
+    build with the same key is cached. Builds go to a temporary file and are renamed
+    into place once signed, under a file lock, so concurrent starts (agent and Discord
+    bot) neither race nor load a half-written library.
+    """
+    source_files = sources(swift_dir)
+    entitlements = os.path.join(swift_dir, "Executor.entitlements")
+    key = build_key(source_files, entitlements, toolchain_version())
+    directory = build_dir()
+    path = os.path.join(directory, f"libexecutor-{key[:16]}.dylib")
+    if os.path.exists(path) and not force:
+        return path
+    with open(os.path.join(directory, "build.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if os.path.exists(path) and not force:
+            return path # built by another process while we waited
+        print("🔨 Compiling Swift executor library...")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            subprocess.run(shlex.split(SWIFTC) + ["-emit-library"] + source_files + ["-o", tmp_path], check=True)
+            subprocess.run(shlex.split(CODESIGN) + ["-s", "-", "--entitlements", entitlements, tmp_path], check=True)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    prune(directory, KEEP_BUILDS)
+    return path
+
+if __name__ == "__main__":
+    # python -m utils.swift_build [path | rebuild | clear]
+    command = sys.argv[1] if len(sys.argv) > 1 else "path"
+    if command == "path":
+        print(library_path())
+    elif command == "rebuild":
+        print(library_path(force=True))
+    elif command == "clear":
+        prune(build_dir(), 0)
+        toolchains.clear()
+        print("✅ swift build cache cleared")
+    else:
+        print("usage: python -m utils.swift_build [path | rebuild | clear]")
@@ -0,0 +1,162 @@
+from contextlib import contextmanager
+import contextvars
+import threading
+import json
+import time
+import os
+import re
+
+# Callables taking (name, start, duration, attributes); see add_recorder. Recorders
+# are called on the thread that ran the span. _recorders see every span in the
+# process; _task_recorders only those of the task they were added in (trace_task),
+# so tasks running side by side each get their own trace.
+_recorders = []
+_recorders_lock = threading.Lock()
+_task_recorders = contextvars.ContextVar("zeus_task_recorders", default=())
+_local = threading.local()
+
+def add_recorder(recorder):
+    with _recorders_lock:
+        _recorders.append(recorder)
+
+def remove_recorder(recorder):
+    with _recorders_lock:
+        if recorder in _recorders:
+            _recorders.remove(recorder)
+
+def bind(fn):
+    """
+    fn, made to record into the calling task's trace wherever it runs. Context
+    variables don't follow work onto other threads, so wrap anything handed to a
+    thread or pool with this.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+def record(name, start, duration, **attributes):
+    """Reports a finished span. start is a time.perf_counter() value."""
+    for recorder in list(_recorders) + list(_task_recorders.get()):
+        try:
+            recorder(name, start, duration, attributes)
+        except Exception as e:
+            print(f"Trace recorder error: {e}")
+
+class Span:
+    __slots__ = ("name", "start", "attributes")
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.start = time.perf_counter()
+        self.attributes = attributes
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+def current_span():
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else None
+
+def annotate(**attributes):
+    """Adds attributes to the innermost open span on this thread, if any."""
+    current = current_span()
+    if current is not None:
+        current.attributes.update(attributes)
+
+@contextmanager
+def span(name, **attributes):
+    """Times the enclosed block as one stage; attributes can be added with span.set()."""
+    current = Span(name, attributes)
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    stack.append(current)
+    try:
+        yield current
+    except Exception as e:
+        current.set("error", repr(e))
+        raise
+    finally:
+        stack.pop()
+        if _recorders or _task_recorders.get():
+            record(name, current.start, time.perf_counter() - current.start, **current.attributes)
+
+class TraceRecorder:
+    """Collects spans as Chrome trace events (open in chrome://tracing or ui.perfetto.dev)."""
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.wall_start = time.time()
+        self.events = []
+        self.threads = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, name, start, duration, attributes):
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": name.split(".")[0],
+            "ph": "X",
+            "ts": round((start - self.origin) * 1e6, 1),
+            "dur": round(duration * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": thread.ident,
+            "args": attributes,
+        }
+        with self.lock:
+            self.events.append(event)
+            self.threads[thread.ident] = thread.name
+
+    def to_chrome(self):
+        with self.lock:
+            metadata = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+                        for tid, name in self.threads.items()]
+            return {
+                "traceEvents": metadata + sorted(self.events, key=lambda event: event["ts"]),
+                "displayTimeUnit": "ms",
+                "otherData": {"started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.wall_start))},
+            }
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_chrome(), f, default=str)
+        return path
+
+def trace_dir():
+    """Where per-task traces go: $ZEUS_TRACE_DIR, else <cache dir>/traces. ZEUS_TRACE=0 turns them off."""
+    if os.environ.get("ZEUS_TRACE", "1") == "0":
+        return None
+    if os.environ.get("ZEUS_TRACE_DIR"):
+        return os.environ["ZEUS_TRACE_DIR"]
+    from utils.cache import cache_dir
+    return os.path.join(cache_dir(), "traces")
+
+def prune(directory, keep=50):
+    traces = sorted(entry for entry in os.listdir(directory) if entry.endswith(".json"))
+    for entry in traces[:-keep]:
+        try:
+            os.remove(os.path.join(directory, entry))
+        except OSError:
+            pass
+
+@contextmanager
+def trace_task(task):
+    """
+    Wraps one task in a "task" span and writes the spans it records, on this thread
+    and on any bind()-wrapped work it starts, to its own trace file.
+    """
+    directory = trace_dir()
+    recorder = TraceRecorder() if directory else None
+    token = _task_recorders.set(_task_recorders.get() + (recorder,)) if recorder else None
+    try:
+        with span("task", task=task) as task_span:
+            yield task_span
+    finally:
+        if recorder:
+            _task_recorders.reset(token)
+            slug = re.sub(r"[^a-z0-9]+", "-", task.lower()).strip("-")[:40] or "task"
+            try:
+                path = recorder.save(os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}.json"))
+                prune(directory)
+                print(f"📄 Trace saved to {path}")
+            except Exception as e:
+                print(f"Error saving trace: {e}")
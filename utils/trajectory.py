@@ -0,0 +1,31 @@
+import hashlib
+import re
+from utils.cache import DiskLRU
+from utils.plan_cache import normalize
+
+# Successful runs, keyed by normalized task. Each step is the fingerprint of the
+# screen the agent saw and the actions it took from there.
+cache = DiskLRU("trajectories.json", max_entries=128)
+
+def fingerprint(snapshot):
+    """
+    Hashes what identifies which screen we're on: the active app and each clickable
+    element's id, role and label. The running-app list is left out, and digits in
+    labels are masked so clocks and counters don't break a match.
+    """
+    parts = [f"{snapshot.app_name}|{snapshot.bundle_id}"]
+    for element in snapshot.clickable():
+        parts.append(f"{element.clickable_id}|{element.role}|{re.sub(r'[0-9]+', '#', element.label)[:40]}")
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+def lookup(task):
+    """Returns the recorded steps for task, or None."""
+    steps = cache.get(normalize(task))
+    cache.record(steps is not None)
+    return steps
+
+def store(task, steps):
+    cache.put(normalize(task), steps)
+
+def invalidate(task):
+    return cache.remove(normalize(task))
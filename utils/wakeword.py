@@ -0,0 +1,81 @@
+import difflib
+import string
+import os
+from utils.audio import RATE, to_float
+
+TRIGGER_PHRASES = ["hey zeus", "hey seuss", "hello zeus", "ay flow"]
+
+# Rolling window the wake model listens to, and how often it is re-run while someone talks
+WINDOW_SECONDS = float(os.environ.get("ZEUS_WAKE_WINDOW", 1.5))
+HOP_SECONDS = float(os.environ.get("ZEUS_WAKE_HOP", 0.5))
+# How close a transcribed word pair must be to a phrase to count ("hey zoos")
+MATCH_RATIO = 0.75
+# A phrase ending this close to the end of the window may be cut off mid-word
+EDGE_SECONDS = 0.15
+
+def normalize(text):
+    return " ".join(text.lower().translate(str.maketrans("", "", string.punctuation)).split())
+
+def match_phrase(words, phrases=TRIGGER_PHRASES, ratio=MATCH_RATIO):
+    """
+    Index just past the first run of normalized words that matches a trigger phrase
+    exactly or closely enough, or None.
+    """
+    for phrase in phrases:
+        size = len(phrase.split())
+        for index in range(len(words) - size + 1):
+            candidate = " ".join(words[index:index + size])
+            if candidate == phrase or difflib.SequenceMatcher(None, candidate, phrase).ratio() >= ratio:
+                return index + size
+    return None
+
+def strip_phrase(transcript, phrases=TRIGGER_PHRASES):
+    """The part of transcript after the trigger phrase, or None if there is none."""
+    words = transcript.split()
+    end = match_phrase([normalize(word) for word in words], phrases)
+    return None if end is None else " ".join(words[end:]).strip(" ,.!?")
+
+class WakeWordDetector:
+    """
+    First stage of listening: a small model transcribes the last WINDOW_SECONDS of
+    audio every HOP_SECONDS while the VAD hears speech, and word timestamps locate
+    where the wake phrase ends, so the full model only ever sees the command.
+    """
+    def __init__(self, model, phrases=TRIGGER_PHRASES, window_seconds=WINDOW_SECONDS, hop_seconds=HOP_SECONDS, rate=RATE):
+        self.model = model
+        self.phrases = phrases
+        self.window = int(window_seconds * rate)
+        self.hop = int(hop_seconds * rate)
+        self.rate = rate
+        self.last_check = None
+        self.checks = 0
+
+    def due(self, position):
+        return self.last_check is None or position - self.last_check >= self.hop
+
+    def reset(self):
+        self.last_check = None
+
+    def check(self, ring, position, start=0, final=False):
+        """
+        Looks for the wake phrase in the window ending at position (not before
+        start). Returns the absolute position where the phrase ends, or None. Unless
+        final (the utterance is over), a phrase running up to the window's edge is
+        left for the next check, as its last word may still be being spoken.
+        """
+        self.last_check = position
+        self.checks += 1
+        window_start = max(start, ring.start, position - self.window)
+        samples = ring.get(window_start, position)
+        if len(samples) < self.rate // 4:
+            return None
+        segments, _ = self.model.transcribe(to_float(samples), language="en", beam_size=1, word_timestamps=True,
+                                            condition_on_previous_text=False, without_timestamps=False)
+        words = [word for segment in segments for word in (segment.words or []) if normalize(word.word)]
+        end = match_phrase([normalize(word.word) for word in words], self.phrases)
+        if end is None:
+            return None
+        phrase_end = window_start + int(words[end - 1].end * self.rate)
+        if not final and position - phrase_end < EDGE_SECONDS * self.rate:
+            return None
+        return phrase_end